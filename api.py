@@ -7,18 +7,41 @@ using the ADK agent system with parallel risk evaluators.
 
 import asyncio
 import logging
+import os
+import secrets
+import time
 import traceback
-from typing import Dict, Any
-from fastapi import FastAPI, HTTPException
+import uuid
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Any
+from fastapi import Depends, FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
-from risk_evaluator.agent import root_agent
-from risk_evaluator.shared_libraries.types import PolicyRequest, RiskEvaluation, RiskScore
-from google.adk.apps import App
-from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
-from google.genai import types
+from risk_evaluator.shared_libraries.types import EvaluationUsage, PolicyRequest, RiskEvaluation, RiskScore
+from risk_evaluator.shared_libraries import parsing
+from risk_evaluator.shared_libraries.parsing import RiskEvaluationParseError, parse_risk_evaluation
+from risk_evaluator.shared_libraries.state import (
+    PARSE_FAILED_STATE_PREFIX,
+    POLICY_REQUEST_STATE_KEY,
+    REQUEST_ID_STATE_KEY,
+    dimension_registry,
+)
+from risk_evaluator.shared_libraries.singleflight import SingleFlight
+from risk_evaluator.shared_libraries import http_pool, profiling, resilience, tool_runtime, usage
+from risk_evaluator.shared_libraries.admission import (
+    AdmissionController,
+    AdmissionRejected,
+    Priority,
+)
+
+if TYPE_CHECKING:
+    from google.adk.sessions import InMemorySessionService
+
+# google.adk, litellm and the agent modules are imported lazily: together they
+# account for most of the process start-up time.
 
 # Load environment variables from .env file
 load_dotenv()
@@ -31,10 +54,59 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=None)
+def get_root_agent():
+    """Builds the agent tree (and its model clients) on first use."""
+    from risk_evaluator.agent import root_agent
+    return root_agent
+
+
+@lru_cache(maxsize=None)
+def get_plugins() -> list:
+    """Builds the ADK plugins registered on the API runners."""
+    from risk_evaluator.shared_libraries.profiling_plugin import ProfilingPlugin
+    from risk_evaluator.shared_libraries.usage_plugin import UsagePlugin
+    return [UsagePlugin(), ProfilingPlugin()]
+
+
+def _agent_models(agent) -> set:
+    """LiteLLM model names used by an agent tree."""
+    model = getattr(agent, "model", None)
+    name = model if isinstance(model, str) else getattr(model, "model", None)
+    models = {name} if name else set()
+    for sub_agent in agent.sub_agents:
+        models |= _agent_models(sub_agent)
+    return models
+
+
+async def warm_up() -> None:
+    """Pre-initializes the agent tree, the ADK runtime and the provider connections before the first request."""
+    start = time.perf_counter()
+    root_agent = get_root_agent()
+    get_plugins()
+    import google.adk.apps  # noqa: F401
+    import google.adk.runners  # noqa: F401
+    import google.adk.sessions  # noqa: F401
+    hosts = await http_pool.warm_connections(_agent_models(root_agent))
+    logger.info("Warm-up completed in %.2fs (%i provider connections opened)", time.perf_counter() - start, hosts)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Runs the optional warm-up (RISKEVAL_WARMUP=1); on shutdown, releases the model connections and tool threads."""
+    if os.getenv("RISKEVAL_WARMUP", "").lower() in ("1", "true", "yes"):
+        await warm_up()
+    yield
+    profiling.stop_profiling()
+    await http_pool.close_http_pool()
+    tool_runtime.shutdown_tool_executor()
+
+
 app = FastAPI(
     title="Insurance Risk Evaluator API",
     description="API for evaluating insurance policy risk using parallel AI agents",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Enable CORS for frontend integration
@@ -46,6 +118,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Identical concurrent evaluations share a single agent run
+evaluation_flight = SingleFlight(name="evaluate")
+
+# Bounds concurrent workflow executions, adapting to latency and provider 429s
+admission_controller = AdmissionController(
+    initial_limit=int(os.getenv("RISKEVAL_INITIAL_CONCURRENCY", "8")),
+    max_limit=int(os.getenv("RISKEVAL_MAX_CONCURRENCY", "64")),
+    max_queue=int(os.getenv("RISKEVAL_MAX_QUEUE", "100")),
+    target_latency=float(os.getenv("RISKEVAL_TARGET_LATENCY_SECS", "30")),
+)
+resilience.add_rate_limit_listener(admission_controller.record_throttled)
+
+# Agent producing each structured output of the workflow
+OUTPUT_AGENTS = {
+    "geographic_risk": "geographic_risk_evaluator",
+    "vehicle_risk": "vehicle_risk_evaluator",
+    "person_risk": "person_risk_evaluator",
+    "global_risk": "global_evaluator",
+}
+
 
 class RiskEvaluationResponse(BaseModel):
     """Response model for risk evaluation"""
@@ -54,6 +146,7 @@ class RiskEvaluationResponse(BaseModel):
     person_risk: RiskEvaluation | None = None
     global_risk: RiskEvaluation
     request: PolicyRequest
+    usage: EvaluationUsage | None = None
 
 
 @app.get("/")
@@ -72,12 +165,107 @@ async def health():
     return {
         "status": "healthy",
         "agent": "root_agent",
+        "agent_loaded": get_root_agent.cache_info().currsize > 0,
         "evaluators": ["geographic", "vehicle", "person", "global"]
     }
 
 
+@app.get("/stats/structured-output")
+async def structured_output_stats():
+    """Per-agent counters of repaired, unparseable and re-asked outputs"""
+    return parsing.get_parse_stats()
+
+
+@app.get("/stats/admission")
+async def admission_stats():
+    """Current adaptive concurrency limit and queue state"""
+    return admission_controller.stats()
+
+
+@app.get("/stats/resilience")
+async def resilience_stats():
+    """Circuit breaker state and retry budget usage per model"""
+    return resilience.get_resilience_stats()
+
+
+@app.get("/stats/http-pool")
+async def http_pool_stats():
+    """Connection reuse and utilization of the pool shared by the model calls"""
+    return http_pool.get_http_pool_stats()
+
+
+@app.get("/stats/tools")
+async def tool_stats():
+    """Per-tool call counts, timeouts and latency percentiles, and the tool thread pool state"""
+    return tool_runtime.get_tool_stats()
+
+
+@app.get("/stats/usage")
+async def usage_stats():
+    """Rolling token, cost and latency summary of the recent evaluations, per agent"""
+    return usage.get_usage_summary()
+
+
+def require_admin(x_admin_token: str | None = Header(default=None)) -> None:
+    """Admits the requests carrying RISKEVAL_ADMIN_TOKEN; admin endpoints are disabled when it is unset."""
+    admin_token = os.getenv("RISKEVAL_ADMIN_TOKEN")
+    if not admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@app.post("/admin/profile", dependencies=[Depends(require_admin)])
+async def start_profile(duration_secs: float = 30, interval_ms: float = 10, include_idle: bool = False):
+    """Opens a profiling window: sampling profiler, event loop lag monitor and per-request phase timelines"""
+    try:
+        return profiling.start_profiling(duration_secs, interval_ms, include_idle)
+    except profiling.ProfilingError as e:
+        raise HTTPException(status_code=409 if profiling.is_profiling() else 400, detail=str(e))
+
+
+@app.delete("/admin/profile", dependencies=[Depends(require_admin)])
+async def stop_profile():
+    """Closes the profiling window before its end and returns its report"""
+    report = profiling.stop_profiling()
+    if report is None:
+        raise HTTPException(status_code=404, detail="No profiling window is open")
+    return report
+
+
+@app.get("/admin/profile", dependencies=[Depends(require_admin)])
+async def profile_report():
+    """State of the profiling window and report of the last closed one"""
+    return {**profiling.get_profiling_status(), "report": profiling.get_last_report()}
+
+
+@app.get("/admin/profile/flamegraph", dependencies=[Depends(require_admin)])
+async def profile_flamegraph():
+    """Folded stacks of the last profiling window, for flamegraph.pl or speedscope"""
+    folded = profiling.get_last_folded_stacks()
+    if folded is None:
+        raise HTTPException(status_code=404, detail="No profiling window has been closed yet")
+    return PlainTextResponse(
+        folded, headers={"Content-Disposition": 'attachment; filename="riskeval-profile.folded"'}
+    )
+
+
+def _parse_priority(value: str) -> Priority:
+    try:
+        return Priority[value.strip().upper()]
+    except KeyError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid priority '{value}', expected one of: "
+                   f"{', '.join(p.name.lower() for p in Priority)}"
+        )
+
+
 @app.post("/evaluate", response_model=RiskEvaluationResponse)
-async def evaluate_risk(policy_request: PolicyRequest):
+async def evaluate_risk(
+    policy_request: PolicyRequest,
+    x_request_priority: str = Header(default="interactive")
+):
     """
     Evaluate insurance policy risk.
 
@@ -86,26 +274,79 @@ async def evaluate_risk(policy_request: PolicyRequest):
 
     Args:
         policy_request: Policy holder and vehicle information
+        x_request_priority: Admission priority, "interactive" (default) or "batch"
 
     Returns:
         RiskEvaluationResponse with individual and global risk assessments
 
     Raises:
-        HTTPException: If evaluation fails
+        HTTPException: If evaluation fails, or 503 when the server is overloaded
     """
+    priority = _parse_priority(x_request_priority)
+
+    # Concurrent identical requests (client retries, several front-ends
+    # quoting the same policy) await one shared evaluation. The priority is
+    # part of the key, so an interactive caller never waits in a flight
+    # admitted (or shed) as batch.
+    return await evaluation_flight.do(
+        (priority, policy_request.model_dump_json()),
+        lambda: _admitted_evaluation(policy_request, priority)
+    )
+
+
+async def _admitted_evaluation(
+    policy_request: PolicyRequest, priority: Priority
+) -> RiskEvaluationResponse:
+    """Runs the evaluation once the admission controller grants a slot."""
+    try:
+        async with admission_controller.slot(priority):
+            return await _run_evaluation(policy_request)
+    except AdmissionRejected as e:
+        logger.warning("Rejecting %s evaluation: %s", priority.name.lower(), e)
+        raise HTTPException(
+            status_code=503,
+            detail="Server overloaded, please retry later",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+
+async def _run_evaluation(policy_request: PolicyRequest) -> RiskEvaluationResponse:
+    """Runs the agent workflow for a single policy request."""
+    from google.adk.apps import App
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+    from google.genai import types
+    from risk_evaluator.sub_agents.global_evaluator import verdict_matrix
+    from risk_evaluator.sub_agents.global_evaluator.agent import (
+        INPUT_KEYS,
+        TableGlobalEvaluator,
+        read_evaluation,
+    )
+
+    request_id = uuid.uuid4().hex
+    usage.usage_collector.start(request_id)
+    # None unless a profiling window is open
+    timeline = profiling.request_timeline(request_id)
     try:
         # Create the ADK app and session service
-        adk_app = App(name='risk_eval_api', root_agent=root_agent)
+        adk_app = App(name='risk_eval_api', root_agent=get_root_agent(), plugins=get_plugins())
         session_service = InMemorySessionService()
 
-        # Create session
+        # Create session, exposing the structured request to the agent callbacks
         user_id = 'api_user'
-        session_id = f'session_{id(policy_request)}'  # Unique session per request
+        session_id = f'session_{request_id}'
+        started = time.perf_counter()
         await session_service.create_session(
             user_id=user_id,
             session_id=session_id,
-            app_name='risk_eval_api'
+            app_name='risk_eval_api',
+            state={
+                POLICY_REQUEST_STATE_KEY: policy_request.model_dump(mode="json"),
+                REQUEST_ID_STATE_KEY: request_id,
+            }
         )
+        if timeline is not None:
+            timeline.add(profiling.SESSION_CREATION, "create_session", started)
 
         # Create runner
         runner = Runner(app=adk_app, session_service=session_service)
@@ -119,54 +360,81 @@ Please evaluate the insurance risk for the following policy application:
 City: {policy_request.city}
 Tariff ID: {policy_request.tariff_id}
 Vehicle Brand: {policy_request.vehicle_brand}
-Fiscal Code: {policy_request.fiscal_code}
+{_vehicle_details(policy_request)}Fiscal Code: {policy_request.fiscal_code}
 
 Provide a complete risk evaluation.
 """)]
         )
 
         # Collect results from agent events
-        geographic_risk = None
-        vehicle_risk = None
-        person_risk = None
-        global_risk = None
+        evaluations: Dict[str, RiskEvaluation | None] = dict.fromkeys(OUTPUT_AGENTS)
+        failed_outputs = set()
 
+        last_event = time.perf_counter()
         async for event in runner.run_async(
             user_id=user_id,
             session_id=session_id,
             new_message=message
         ):
+            if timeline is not None:
+                last_event = timeline.add(profiling.RUN_ASYNC_EVENT, event.author, last_event)
             # Check for structured outputs in state_delta
             if event.actions and event.actions.state_delta:
-                state_delta = event.actions.state_delta
-
-                if "geographic_risk" in state_delta:
-                    geographic_risk = RiskEvaluation(**state_delta["geographic_risk"])
-                if "vehicle_risk" in state_delta:
-                    vehicle_risk = RiskEvaluation(**state_delta["vehicle_risk"])
-                if "person_risk" in state_delta:
-                    person_risk = RiskEvaluation(**state_delta["person_risk"])
-                if "global_risk" in state_delta:
-                    global_risk = RiskEvaluation(**state_delta["global_risk"])
+                _collect_outputs(event.actions.state_delta, evaluations, failed_outputs)
+
+        # Re-ask only the agents whose output could not be parsed, in workflow
+        # order so that runs (and their recordings) are reproducible
+        reasked = []
+        for output_key in [key for key in INPUT_KEYS if key in failed_outputs]:
+            retried = await _reask_agent(
+                OUTPUT_AGENTS[output_key], session_service, user_id, session_id
+            )
+            if retried is not None:
+                evaluations[output_key] = retried
+                reasked.append(output_key)
+
+        # The global verdict was written on the failed sub-evaluations: a table
+        # verdict costs nothing to recompute, the LLM one is asked again
+        global_evaluator = get_root_agent().find_agent(OUTPUT_AGENTS["global_risk"])
+        if reasked and isinstance(global_evaluator, TableGlobalEvaluator):
+            evaluations["global_risk"] = verdict_matrix.VERDICT_MATRIX.evaluate(*(
+                evaluations[key] or read_evaluation(None) for key in INPUT_KEYS
+            ))
+        elif reasked or "global_risk" in failed_outputs:
+            retried = await _reask_agent(
+                OUTPUT_AGENTS["global_risk"], session_service, user_id, session_id,
+                prompt=_reevaluation_prompt(reasked) if reasked else REASK_PROMPT
+            )
+            if retried is not None:
+                evaluations["global_risk"] = retried
+            elif reasked:
+                # Never answer a verdict contradicting the corrected sub-scores
+                logger.warning("Falling back to the verdict matrix for the global evaluation")
+                evaluations["global_risk"] = verdict_matrix.VERDICT_MATRIX.evaluate(*(
+                    evaluations[key] or read_evaluation(None) for key in INPUT_KEYS
+                ))
 
         # Ensure we have at least the global risk
-        if global_risk is None:
+        if evaluations["global_risk"] is None:
             raise HTTPException(
                 status_code=500,
                 detail="Risk evaluation failed: No global risk assessment generated"
             )
 
         return RiskEvaluationResponse(
-            geographic_risk=geographic_risk,
-            vehicle_risk=vehicle_risk,
-            person_risk=person_risk,
-            global_risk=global_risk,
-            request=policy_request
+            geographic_risk=evaluations["geographic_risk"],
+            vehicle_risk=evaluations["vehicle_risk"],
+            person_risk=evaluations["person_risk"],
+            global_risk=evaluations["global_risk"],
+            request=policy_request,
+            usage=usage.usage_collector.finish(request_id)
         )
 
     except HTTPException:
         raise
     except Exception as e:
+        # Provider 429s already reached the admission controller through the
+        # resilience rate-limit listener
         # Log the full traceback for debugging
         logger.error("Risk evaluation failed with exception:")
         logger.error(traceback.format_exc())
@@ -174,10 +442,111 @@ Provide a complete risk evaluation.
             status_code=500,
             detail=f"Risk evaluation failed: {str(e)}"
         )
+    finally:
+        # Let requests waiting on our per-dimension evaluations run their own
+        dimension_registry.release_owner(request_id)
+        usage.usage_collector.discard(request_id)
+        if timeline is not None:
+            timeline.finish()
+
+
+def _vehicle_details(policy_request: PolicyRequest) -> str:
+    """Formats the optional vehicle factors of the request, one line each."""
+    details = ""
+    if policy_request.vehicle_power_kw is not None:
+        details += f"Vehicle Power: {policy_request.vehicle_power_kw} kW\n"
+    if policy_request.yearly_mileage_km is not None:
+        details += f"Yearly Mileage: {policy_request.yearly_mileage_km} km\n"
+    if policy_request.usage_type is not None:
+        details += f"Usage Type: {policy_request.usage_type.value}\n"
+    return details
+
+
+def _collect_outputs(
+    state_delta: Dict[str, Any],
+    evaluations: Dict[str, RiskEvaluation | None],
+    failed_outputs: set
+) -> None:
+    """Parses the agent outputs found in a state delta, tolerating malformed ones."""
+    for output_key, agent_name in OUTPUT_AGENTS.items():
+        if output_key in state_delta:
+            try:
+                evaluations[output_key], repaired = parse_risk_evaluation(state_delta[output_key])
+                if repaired:
+                    parsing.repair_counts[agent_name] += 1
+            except RiskEvaluationParseError as e:
+                parsing.failure_counts[agent_name] += 1
+                logger.warning("Could not parse %s output: %s", agent_name, e)
+                failed_outputs.add(output_key)
+        if state_delta.get(PARSE_FAILED_STATE_PREFIX + agent_name):
+            failed_outputs.add(output_key)
+
+
+REASK_PROMPT = (
+    "Your previous answer could not be parsed. Reply again with only a JSON object "
+    "with the fields 'score' (one of LOW, MEDIUM, HIGH, VERY_HIGH, NOT_AVAILABLE) "
+    "and 'evaluation'."
+)
+
+
+def _reevaluation_prompt(output_keys) -> str:
+    """Asks the global evaluator to judge again after sub-evaluations were corrected."""
+    dimensions = " and ".join(key.replace("_", " ") for key in output_keys)
+    was, has = ("evaluations were", "have") if len(output_keys) > 1 else ("evaluation was", "has")
+    return (
+        f"The {dimensions} {was} not available before and {has} now been provided. "
+        "Produce the final evaluation again on the updated evaluations. Reply with only a "
+        "JSON object with the fields 'score' (one of LOW, MEDIUM, HIGH, VERY_HIGH, "
+        "NOT_AVAILABLE) and 'evaluation'."
+    )
+
+
+async def _reask_agent(
+    agent_name: str,
+    session_service: "InMemorySessionService",
+    user_id: str,
+    session_id: str,
+    prompt: str = REASK_PROMPT
+) -> RiskEvaluation | None:
+    """Runs a single agent once more in the request session, asking for valid JSON.
+
+    Returns:
+        The parsed evaluation, or None if the agent failed again.
+    """
+    from google.adk.runners import Runner
+    from google.genai import types
+
+    parsing.reask_counts[agent_name] += 1
+    agent = get_root_agent().find_agent(agent_name).clone()
+    runner = Runner(
+        app_name='risk_eval_api', agent=agent, session_service=session_service, plugins=get_plugins()
+    )
+    message = types.Content(role='user', parts=[types.Part(text=prompt)])
+
+    result = None
+    failed = False
+    async for event in runner.run_async(user_id=user_id, session_id=session_id, new_message=message):
+        if event.actions and event.actions.state_delta:
+            state_delta = event.actions.state_delta
+            if state_delta.get(PARSE_FAILED_STATE_PREFIX + agent_name):
+                failed = True
+            if agent.output_key in state_delta:
+                try:
+                    result, _ = parse_risk_evaluation(state_delta[agent.output_key])
+                except RiskEvaluationParseError:
+                    failed = True
+
+    if failed or result is None:
+        logger.warning("Re-asking %s did not produce a valid evaluation", agent_name)
+        return None
+    return result
 
 
 @app.post("/evaluate/global-only")
-async def evaluate_risk_global_only(policy_request: PolicyRequest):
+async def evaluate_risk_global_only(
+    policy_request: PolicyRequest,
+    x_request_priority: str = Header(default="interactive")
+):
     """
     Evaluate insurance policy risk and return only the global assessment.
 
@@ -185,11 +554,12 @@ async def evaluate_risk_global_only(policy_request: PolicyRequest):
 
     Args:
         policy_request: Policy holder and vehicle information
+        x_request_priority: Admission priority, "interactive" (default) or "batch"
 
     Returns:
         Global risk evaluation only
     """
-    result = await evaluate_risk(policy_request)
+    result = await evaluate_risk(policy_request, x_request_priority)
     return {
         "score": result.global_risk.score,
         "evaluation": result.global_risk.evaluation,
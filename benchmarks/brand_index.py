@@ -0,0 +1,103 @@
+"""
+Benchmark of the vehicle brand index.
+
+Builds an index with the default brand tables plus a synthetic catalogue of
+brands and models (10k+ entries by default) and measures build time and
+lookup latency per match type.
+
+Usage:
+    python benchmarks/brand_index.py [--entries 10000] [--lookups 4000]
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from risk_evaluator.sub_agents.vehicle_risk_evaluator.brand_index import (  # noqa: E402
+    BRAND_ALIASES,
+    BRAND_CATEGORIES,
+    MODEL_BRANDS,
+    BrandIndex,
+)
+
+CATEGORIES = ["LOW", "MEDIUM", "HIGH", "VERY_HIGH"]
+
+
+def _word(rng: random.Random, length: int) -> str:
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(length)).capitalize()
+
+
+def build_index(entries: int, rng: random.Random):
+    """Builds the default index plus synthetic brands with ten models each."""
+    brands = dict(BRAND_CATEGORIES)
+    models = {brand: list(names) for brand, names in MODEL_BRANDS.items()}
+    while sum(1 for _ in brands) + sum(len(m) for m in models.values()) < entries:
+        brand = _word(rng, rng.randint(5, 10))
+        brands[brand] = rng.choice(CATEGORIES)
+        models[brand] = [f"{_word(rng, rng.randint(3, 8))} {rng.randint(1, 999)}" for _ in range(10)]
+
+    start = time.perf_counter()
+    index = BrandIndex()
+    aliases = {}
+    for alias, brand in BRAND_ALIASES.items():
+        aliases.setdefault(brand, []).append(alias)
+    for brand, category in brands.items():
+        index.add_brand(brand, category, aliases.get(brand, ()))
+    for brand, names in models.items():
+        for name in names:
+            index.add_model(name, brand)
+    return index, time.perf_counter() - start, brands, models
+
+
+def _typo(rng: random.Random, word: str) -> str:
+    position = rng.randrange(1, len(word) - 1)
+    return word[:position] + word[position + 1:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=10000, help="brands + models in the index")
+    parser.add_argument("--lookups", type=int, default=4000, help="lookups per query kind")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    index, build_secs, brands, models = build_index(args.entries, rng)
+    print(f"index: {len(index)} names, built in {build_secs * 1000:.1f} ms")
+
+    brand_names = [b for b in brands if len(b) >= 6]
+    model_names = [m for names in models.values() for m in names]
+    queries = {
+        "exact brand": [rng.choice(brand_names) for _ in range(args.lookups)],
+        "model": [rng.choice(model_names) for _ in range(args.lookups)],
+        "brand + model": [f"{b} {rng.choice(models.get(b) or ['x'])}"
+                          for b in (rng.choice(brand_names) for _ in range(args.lookups))],
+        "typo": [_typo(rng, rng.choice(brand_names)) for _ in range(args.lookups)],
+        "unknown": [_word(rng, 9) for _ in range(args.lookups)],
+    }
+
+    print(f"\n{'query kind':<15} {'cold us/op':>11} {'cached us/op':>13} {'matched':>8}")
+    for kind, batch in queries.items():
+        # Cold: a fresh cache for every query
+        start = time.perf_counter()
+        matched = 0
+        for query in batch:
+            index.clear_cache()
+            matched += index.lookup(query) is not None
+        cold = (time.perf_counter() - start) / len(batch) * 1e6
+
+        for query in batch:
+            index.lookup(query)
+        start = time.perf_counter()
+        for query in batch:
+            index.lookup(query)
+        cached = (time.perf_counter() - start) / len(batch) * 1e6
+        print(f"{kind:<15} {cold:>11.1f} {cached:>13.2f} {matched / len(batch):>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Connection reuse benchmark for the model calls.
+
+Starts a local stand-in for the Anthropic Messages API, which answers every
+request after a fixed delay and counts the TCP connections it accepts, then
+sends the same concurrent load of LiteLLM completions through:
+
+- pooled:   the shared pool of `http_pool`, as the agents do
+- per-call: a new HTTP client for every call (no connection reuse)
+
+and reports throughput, latency percentiles and connections opened. The
+stand-in speaks plain HTTP, so the gap measured here is only the TCP set-up;
+against a real provider each new connection also pays a TLS handshake.
+
+Usage:
+    python benchmarks/llm_connection_pool.py [--calls 200] [--concurrency 20] [--latency-ms 20] [--json]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import litellm  # noqa: E402
+from litellm.llms.custom_httpx.http_handler import AsyncHTTPHandler  # noqa: E402
+
+from risk_evaluator.shared_libraries import http_pool  # noqa: E402
+from risk_evaluator.shared_libraries.models import ResilientLiteLLMClient  # noqa: E402
+
+MODEL = "anthropic/claude-sonnet-4-20250514"
+MESSAGES = [{"role": "user", "content": "Evaluate the risk of Milan."}]
+RESPONSE = json.dumps({
+    "id": "msg_local",
+    "type": "message",
+    "role": "assistant",
+    "model": "claude-sonnet-4-20250514",
+    "content": [{"type": "text", "text": '{"score": "MEDIUM", "evaluation": "Stand-in answer"}'}],
+    "stop_reason": "end_turn",
+    "stop_sequence": None,
+    "usage": {"input_tokens": 12, "output_tokens": 16},
+}).encode()
+
+
+class StandInServer:
+    """Minimal keep-alive HTTP/1.1 server answering like the Messages API."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.connections = 0
+        self._server = None
+        self._writers = set()
+
+    async def start(self) -> str:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    async def stop(self) -> None:
+        self._server.close()
+        # Drop the idle keep-alive connections still held by the clients
+        for writer in list(self._writers):
+            writer.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        self._writers.add(writer)
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                await reader.readexactly(length)
+                await asyncio.sleep(self.latency)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\ncontent-type: application/json\r\n"
+                    b"content-length: %i\r\n\r\n" % len(RESPONSE) + RESPONSE
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+
+async def _pooled_call(api_base: str) -> None:
+    await ResilientLiteLLMClient().acompletion(MODEL, MESSAGES, None, api_base=api_base, api_key="local")
+
+
+async def _per_call(api_base: str) -> None:
+    handler = AsyncHTTPHandler()
+    try:
+        await litellm.acompletion(
+            model=MODEL, messages=MESSAGES, api_base=api_base, api_key="local", client=handler
+        )
+    finally:
+        await handler.close()
+
+
+async def run_mode(call, calls: int, concurrency: int, latency: float) -> dict:
+    server = StandInServer(latency)
+    api_base = await server.start()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await call(api_base)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(calls)))
+    elapsed = time.perf_counter() - start
+    await server.stop()
+
+    latencies.sort()
+    return {
+        "calls_per_sec": round(calls / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+        "connections_opened": server.connections,
+    }
+
+
+async def main_async(args) -> dict:
+    # One untimed call per mode loads litellm's provider modules
+    for call in (_pooled_call, _per_call):
+        await run_mode(call, 1, 1, 0)
+    await http_pool.close_http_pool()
+
+    report = {
+        "per-call": await run_mode(_per_call, args.calls, args.concurrency, args.latency_ms / 1000),
+        "pooled": await run_mode(_pooled_call, args.calls, args.concurrency, args.latency_ms / 1000),
+    }
+    report["pool"] = http_pool.get_http_pool_stats()
+    await http_pool.close_http_pool()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200, help="completions per mode")
+    parser.add_argument("--concurrency", type=int, default=20, help="concurrent completions")
+    parser.add_argument("--latency-ms", type=float, default=20, help="stand-in server response delay")
+    parser.add_argument("--json", action="store_true", help="print a machine-readable report")
+    args = parser.parse_args()
+
+    # litellm logs every completion at INFO level, which would dominate the timings
+    logging.getLogger("LiteLLM").setLevel(logging.WARNING)
+    report = asyncio.run(main_async(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{args.calls} calls, concurrency {args.concurrency}, server latency {args.latency_ms:g} ms\n")
+    print(f"{'mode':<10} {'calls/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'connections':>12}")
+    for mode in ("per-call", "pooled"):
+        r = report[mode]
+        print(f"{mode:<10} {r['calls_per_sec']:>9} {r['p50_ms']:>9} {r['p95_ms']:>9} {r['connections_opened']:>12}")
+    pool = report["pool"]
+    print(f"\nshared pool: {pool['requests']} requests, {pool['connections_opened']} connections opened, "
+          f"reuse ratio {pool['reuse_ratio']}, {pool['connection_waits']} waits for a free connection")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Cold-start benchmark for the API process.
+
+Measures, each in a fresh interpreter:
+
+- the time to import `api` (what uvicorn does before accepting connections)
+- the time to build the agent tree on top of it (what the first request,
+  or the warm-up hook, pays)
+
+and prints the slowest modules of the import-time breakdown reported by
+`python -X importtime`, so start-up regressions can be tracked.
+
+Usage:
+    python benchmarks/startup_time.py [--runs 5] [--top 15] [--json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_API = "import time; t = time.perf_counter(); import api; print(time.perf_counter() - t)"
+BUILD_AGENTS = (
+    "import time; t = time.perf_counter(); import api; api.get_root_agent(); "
+    "print(time.perf_counter() - t)"
+)
+
+
+def _run(code: str, *extra_args: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ, LITELLM_LOCAL_MODEL_COST_MAP="True")
+    return subprocess.run(
+        [sys.executable, *extra_args, "-c", code],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+
+
+def time_statement(code: str, runs: int) -> dict:
+    """Runs `code` in `runs` fresh interpreters, returning timing statistics in seconds."""
+    samples = [float(_run(code).stdout.strip().splitlines()[-1]) for _ in range(runs)]
+    return {
+        "median": round(statistics.median(samples), 3),
+        "min": round(min(samples), 3),
+        "max": round(max(samples), 3),
+    }
+
+
+def import_breakdown(code: str, top: int) -> dict:
+    """Returns the slowest modules (cumulative) and the self time per top-level package."""
+    stderr = _run(code, "-X", "importtime").stderr
+    modules = []
+    for line in stderr.splitlines():
+        # Format: "import time: <self us> | <cumulative us> | <indented module name>"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append({
+            "module": name.strip(),
+            "self_ms": round(int(self_us) / 1000, 1),
+            "cumulative_ms": round(int(cumulative_us) / 1000, 1),
+        })
+    by_package = {}
+    for module in modules:
+        package = module["module"].split(".")[0]
+        by_package[package] = by_package.get(package, 0.0) + module["self_ms"]
+    return {
+        "modules": sorted(modules, key=lambda m: m["cumulative_ms"], reverse=True)[:top],
+        "packages": dict(sorted(
+            ((name, round(ms, 1)) for name, ms in by_package.items()),
+            key=lambda item: item[1], reverse=True
+        )[:top]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per measurement")
+    parser.add_argument("--top", type=int, default=15, help="modules listed in the breakdown")
+    parser.add_argument("--json", action="store_true", help="print a machine-readable report")
+    args = parser.parse_args()
+
+    report = {
+        "import_api_secs": time_statement(IMPORT_API, args.runs),
+        "import_api_and_build_agents_secs": time_statement(BUILD_AGENTS, args.runs),
+        "breakdown": import_breakdown(BUILD_AGENTS, args.top),
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print("import api:                 median %(median).3fs (min %(min).3fs, max %(max).3fs)"
+          % report["import_api_secs"])
+    print("import api + build agents:  median %(median).3fs (min %(min).3fs, max %(max).3fs)"
+          % report["import_api_and_build_agents_secs"])
+    print("\nImport time per package (self):")
+    for package, self_ms in report["breakdown"]["packages"].items():
+        print(f"  {self_ms:>9.1f} ms  {package}")
+    print("\nSlowest imports (cumulative):")
+    for module in report["breakdown"]["modules"]:
+        print(f"  {module['cumulative_ms']:>9.1f} ms  {module['module']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Recording and replay of the agents' model responses.
+
+A recording holds, for every evaluation case and agent, the responses of
+each model call in call order, with the time the model took:
+
+    {"version": 1, "cases": {case id: {agent name: [
+        {"latency_secs": 1.8, "responses": [LlmResponse, ...]}, ...
+    ]}}, "synthetic": [case id, ...]}
+
+Cases listed in `synthetic` hold hand-written responses instead of a
+capture of a real model: no latency, no token usage, and answers that
+say nothing about how a model behaves. Recording a case removes it from
+the list.
+
+`RecordingLlm` wraps an agent's model and appends what it answers;
+`ReplayLlm` answers the same calls from the recording, without any network
+access. Tool calls are part of the recorded responses, so on replay ADK
+runs the real tools and the callbacks, parsing and verdict logic just like
+in production.
+"""
+
+import asyncio
+import contextvars
+import json
+import os
+import time
+from typing import AsyncGenerator, Dict, Iterable, List, Optional
+
+from google.adk.agents import LlmAgent
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from pydantic import Field
+
+RECORDING_VERSION = 1
+
+# Id of the evaluation case being run, set by the harness around each case
+current_case: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_case", default=None)
+
+
+class ReplayMiss(LookupError):
+    """Raised when a model call has no recorded response."""
+
+
+class Recording:
+    """Recorded model calls, keyed by case and agent."""
+
+    def __init__(self, cases: Optional[Dict[str, Dict[str, List[dict]]]] = None, synthetic: Iterable[str] = ()):
+        self.cases: Dict[str, Dict[str, List[dict]]] = cases or {}
+        self.synthetic = set(synthetic)
+        self.misses = 0
+        self._next_call: Dict[tuple, int] = {}
+
+    def next_call(self, case_id: str, agent_name: str) -> int:
+        """Returns the index of the next model call of an agent in a case."""
+        key = (case_id, agent_name)
+        index = self._next_call.get(key, 0)
+        self._next_call[key] = index + 1
+        return index
+
+    def reset(self, case_id: str, clear: bool = False) -> None:
+        """Restarts the call indexes of a case; `clear` also drops its recorded calls."""
+        for key in [key for key in self._next_call if key[0] == case_id]:
+            del self._next_call[key]
+        if clear:
+            self.cases.pop(case_id, None)
+            self.synthetic.discard(case_id)
+
+    @classmethod
+    def load(cls, path: str) -> "Recording":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != RECORDING_VERSION:
+            raise ValueError(f"Unsupported recording format in {path}")
+        return cls(data["cases"], data.get("synthetic", ()))
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        data = {"version": RECORDING_VERSION, "cases": self.cases}
+        if self.synthetic:
+            data["synthetic"] = sorted(self.synthetic)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+            f.write("\n")
+
+
+class RecordingLlm(BaseLlm):
+    """Calls the wrapped model and records its responses."""
+
+    inner: BaseLlm
+    agent_name: str
+    recording: Recording = Field(exclude=True)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        case_id = current_case.get()
+        self.recording.next_call(case_id, self.agent_name)
+        call = {"latency_secs": 0.0, "responses": []}
+        self.recording.cases.setdefault(case_id, {}).setdefault(self.agent_name, []).append(call)
+        start = time.perf_counter()
+        async for response in self.inner.generate_content_async(llm_request, stream):
+            call["responses"].append(response.model_dump(mode="json", exclude_none=True))
+            yield response
+        call["latency_secs"] = round(time.perf_counter() - start, 3)
+
+
+class ReplayLlm(BaseLlm):
+    """Answers the model calls from a recording.
+
+    Args:
+        latency_scale: Fraction of the recorded model latency to wait before
+            answering; 0 answers immediately.
+    """
+
+    agent_name: str
+    recording: Recording = Field(exclude=True)
+    latency_scale: float = 0.0
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        case_id = current_case.get()
+        index = self.recording.next_call(case_id, self.agent_name)
+        calls = self.recording.cases.get(case_id, {}).get(self.agent_name, [])
+        if index >= len(calls):
+            self.recording.misses += 1
+            raise ReplayMiss(f"No recorded model call #{index + 1} of {self.agent_name} for case {case_id}")
+        call = calls[index]
+        if self.latency_scale > 0:
+            await asyncio.sleep(call["latency_secs"] * self.latency_scale)
+        for response in call["responses"]:
+            yield LlmResponse.model_validate(response)
+
+
+def llm_agents(agent) -> List[LlmAgent]:
+    """The LLM agents of a tree, i.e. the agents making model calls."""
+    agents = [agent] if isinstance(agent, LlmAgent) else []
+    for sub_agent in agent.sub_agents:
+        agents.extend(llm_agents(sub_agent))
+    return agents
+
+
+def install_recorder(root_agent, recording: Recording) -> None:
+    """Wraps the model of every LLM agent of the tree in a RecordingLlm."""
+    for agent in llm_agents(root_agent):
+        model = agent.canonical_model
+        agent.model = RecordingLlm(model=model.model, inner=model, agent_name=agent.name, recording=recording)
+
+
+def install_replay(root_agent, recording: Recording, latency_scale: float = 0.0) -> None:
+    """Replaces the model of every LLM agent of the tree with a ReplayLlm."""
+    for agent in llm_agents(root_agent):
+        agent.model = ReplayLlm(
+            model=agent.canonical_model.model,
+            agent_name=agent.name,
+            recording=recording,
+            latency_scale=latency_scale,
+        )
@@ -0,0 +1,360 @@
+"""
+Offline evaluation and regression harness.
+
+Runs every case of the golden dataset (evaluation/golden_dataset.json, the
+sample policies of example_usage.py and a few more) through the same path
+as POST /evaluate, and scores the answers against the deterministic ones:
+
+- geographic, vehicle and person scores against the risk level returned by
+  the agent's own tools
+- the global score against the global rule table applied to the
+  sub-scores the agents produced, and against the expected global score
+
+Latency and token use are recorded for every case. By default the model
+responses are replayed from evaluation/recordings/golden.json, so the run
+is offline, deterministic, free and needs no provider API keys: a speed
+optimization that changes a score shows up as a disagreement (or, against
+--baseline, as a regression).
+
+The committed golden.json is a synthetic fixture: hand-written responses
+calling the right tools and restating their answers, with no latency and
+no token usage. It checks the workflow around the models (tools, parsing,
+re-asks, verdict), not the models themselves, and it has no answers of the
+LLM global evaluator (RISKEVAL_GLOBAL_EVALUATOR=llm). The report flags
+synthetic cases and leaves their tokens and cost out. Run --record with the
+provider API keys to replace it with a capture of the real models.
+
+Usage:
+    python -m evaluation.run_eval                 # replay the recorded model responses
+    python -m evaluation.run_eval --record        # capture the real models' responses (needs the API keys)
+    python -m evaluation.run_eval --live          # call the models, without recording
+    python -m evaluation.run_eval --write-golden  # recompute the expected scores from the tools
+
+Options: --cases ID,ID to run a subset, --replay-latency 1.0 to wait the
+recorded model time on replay, --output FILE to save the report,
+--baseline FILE to compare with a saved report, --json.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from typing import Optional
+
+# Replay must not reach the network, LiteLLM's cost map included
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from risk_evaluator.shared_libraries.types import PolicyRequest, RiskScore  # noqa: E402
+
+EVALUATION_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DATASET = os.path.join(EVALUATION_DIR, "golden_dataset.json")
+DEFAULT_RECORDING = os.path.join(EVALUATION_DIR, "recordings", "golden.json")
+
+DIMENSIONS = ["geographic_risk", "vehicle_risk", "person_risk"]
+CHECKS = DIMENSIONS + ["global_rules", "global_risk"]
+
+
+def load_dataset(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_dataset(path: str, dataset: dict) -> None:
+    """Writes the dataset, one line per policy and expected scores."""
+    lines = ['{', f'  "version": {dataset["version"]},', '  "cases": [']
+    for i, case in enumerate(dataset["cases"]):
+        fields = [f'      "{key}": {json.dumps(value)}' for key, value in case.items()]
+        lines.append("    {\n" + ",\n".join(fields) + "\n    }" + ("," if i < len(dataset["cases"]) - 1 else ""))
+    lines += ['  ]', '}']
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def _tool_score(result: dict) -> str:
+    if result.get("status") != "success":
+        return RiskScore.NOT_AVAILABLE.value
+    return result["risk_level"]
+
+
+async def expected_scores(policy: PolicyRequest) -> dict:
+    """Computes the deterministic answer of every dimension from the agents' tools."""
+    from risk_evaluator.sub_agents.geographic_risk_evaluator.tools import (
+        get_risk_evaluation_by_zone,
+        get_zone,
+    )
+    from risk_evaluator.sub_agents.global_evaluator.verdict_matrix import combine_scores
+    from risk_evaluator.sub_agents.person_risk_evaluator.tools import get_risk_evaluation_by_judicial_record
+    from risk_evaluator.sub_agents.vehicle_risk_evaluator.tools import get_risk_evaluation_by_brand
+
+    zone = await get_zone(policy.city, policy.tariff_id)
+    geographic = (
+        await get_risk_evaluation_by_zone(zone["zone_id"]) if zone.get("status") == "success" else zone
+    )
+    vehicle = await get_risk_evaluation_by_brand(
+        policy.vehicle_brand,
+        policy.vehicle_power_kw,
+        policy.yearly_mileage_km,
+        policy.usage_type.value if policy.usage_type else None,
+    )
+    person = await get_risk_evaluation_by_judicial_record(policy.fiscal_code)
+
+    expected = {
+        "geographic_risk": _tool_score(geographic),
+        "vehicle_risk": _tool_score(vehicle),
+        "person_risk": _tool_score(person),
+    }
+    expected["global_risk"] = combine_scores([expected[key] for key in DIMENSIONS])[0]
+    return expected
+
+
+async def run_case(case: dict, recording=None) -> dict:
+    """Evaluates a case through the API workflow and scores its answers."""
+    import api
+    from fastapi import HTTPException
+    from risk_evaluator.sub_agents.global_evaluator.verdict_matrix import combine_scores
+
+    from evaluation.replay import current_case
+
+    policy = PolicyRequest(**case["policy"])
+    expected = case.get("expected") or await expected_scores(policy)
+    result = {"id": case["id"], "expected": expected, "actual": None, "agreement": {}, "error": None}
+
+    result["synthetic"] = recording is not None and case["id"] in recording.synthetic
+    token = current_case.set(case["id"])
+    misses = recording.misses if recording is not None else 0
+    start = time.perf_counter()
+    try:
+        response = await api._run_evaluation(policy)
+    except HTTPException as e:
+        result["error"] = e.detail
+        response = None
+    finally:
+        result["latency_secs"] = round(time.perf_counter() - start, 3)
+        current_case.reset(token)
+    result["replay_misses"] = recording.misses - misses if recording is not None else 0
+
+    if response is None:
+        result["agreement"] = dict.fromkeys(CHECKS, False)
+        return result
+
+    actual = {key: (getattr(response, key).score.value if getattr(response, key) else None)
+              for key in DIMENSIONS + ["global_risk"]}
+    result["actual"] = actual
+    for key in DIMENSIONS + ["global_risk"]:
+        result["agreement"][key] = actual[key] == expected[key]
+    rule_score = combine_scores([actual[key] or RiskScore.NOT_AVAILABLE.value for key in DIMENSIONS])[0]
+    result["agreement"]["global_rules"] = actual["global_risk"] == rule_score
+
+    if result["synthetic"]:
+        # Hand-written responses carry no token usage to measure
+        result["usage"] = None
+        return result
+    total = response.usage.total if response.usage else None
+    result["usage"] = {
+        "model_calls": total.model_calls if total else 0,
+        "input_tokens": total.input_tokens if total else 0,
+        "output_tokens": total.output_tokens if total else 0,
+        "cached_tokens": total.cached_tokens if total else 0,
+        "estimated_cost_usd": total.estimated_cost_usd if total else 0.0,
+    }
+    return result
+
+
+def summarize(results: list) -> dict:
+    """Agreement rate per check, latency percentiles and token totals of a run.
+
+    The token totals only cover the cases with measured usage; they are None
+    when every case was replayed from synthetic responses.
+    """
+    latencies = sorted(result["latency_secs"] for result in results)
+    count = len(results)
+    agreement = {
+        check: round(sum(result["agreement"][check] for result in results) / count, 3) for check in CHECKS
+    }
+    synthetic = sum(1 for result in results if result.get("synthetic"))
+    usages = [result.get("usage") or {} for result in results if not result.get("synthetic")]
+
+    def total(key: str, digits: int = None):
+        if not usages:
+            return None
+        value = sum(usage.get(key, 0) for usage in usages)
+        return round(value, digits) if digits is not None else value
+
+    return {
+        "cases": count,
+        "synthetic_cases": synthetic,
+        "errors": sum(1 for result in results if result["error"]),
+        "replay_misses": sum(result["replay_misses"] for result in results),
+        "agreement": agreement,
+        "overall_agreement": round(
+            sum(all(result["agreement"].values()) for result in results) / count, 3
+        ),
+        "p50_latency_secs": latencies[count // 2],
+        "p95_latency_secs": latencies[min(count - 1, int(count * 0.95))],
+        "total_latency_secs": round(sum(latencies), 3),
+        "model_calls": total("model_calls"),
+        "input_tokens": total("input_tokens"),
+        "output_tokens": total("output_tokens"),
+        "cached_tokens": total("cached_tokens"),
+        "estimated_cost_usd": total("estimated_cost_usd", 6),
+    }
+
+
+def compare(report: dict, baseline: dict) -> list:
+    """Lists the cases whose answers or agreement changed since the baseline."""
+    regressions = []
+    previous = {result["id"]: result for result in baseline["results"]}
+    for result in report["results"]:
+        before = previous.get(result["id"])
+        if before is None:
+            continue
+        if result["actual"] != before["actual"]:
+            regressions.append(f"{result['id']}: scores changed from {before['actual']} to {result['actual']}")
+        lost = [check for check in CHECKS if before["agreement"].get(check) and not result["agreement"][check]]
+        if lost:
+            regressions.append(f"{result['id']}: no longer agrees on {', '.join(lost)}")
+    return regressions
+
+
+def _delta(now: Optional[float], before: Optional[float]) -> str:
+    if now is None:
+        return "n/a"
+    if not before:
+        return f"{now}"
+    return f"{now} ({(now - before) / before:+.1%})"
+
+
+def print_report(report: dict, baseline: dict = None) -> None:
+    summary = report["summary"]
+    before = baseline["summary"] if baseline else {}
+    print(f"Mode: {report['mode']}, {summary['cases']} cases, {summary['errors']} errors, "
+          f"{summary['replay_misses']} replay misses")
+    if summary.get("synthetic_cases"):
+        print(f"Synthetic model responses in {summary['synthetic_cases']} cases (*): no tokens or cost are "
+              "reported for them and their latency is the local workflow only, without any model time")
+    print()
+    print(f"{'case':<36} {'geo':>4} {'veh':>4} {'per':>4} {'rule':>5} {'glob':>5} {'secs':>7} {'tokens':>8}")
+    for result in report["results"]:
+        marks = ["ok" if result["agreement"][check] else "FAIL" for check in CHECKS]
+        usage = result.get("usage") or {}
+        tokens = "-" if result.get("synthetic") else usage.get("input_tokens", 0) + usage.get("output_tokens", 0)
+        name = result["id"] + (" *" if result.get("synthetic") else "")
+        print(f"{name:<36} {marks[0]:>4} {marks[1]:>4} {marks[2]:>4} {marks[3]:>5} {marks[4]:>5} "
+              f"{result['latency_secs']:>7.3f} {tokens:>8}")
+        if result["error"]:
+            print(f"    error: {result['error']}")
+    print()
+    for check in CHECKS:
+        print(f"agreement {check:<16} {summary['agreement'][check]:.3f}")
+    print(f"overall agreement         {summary['overall_agreement']:.3f}")
+    for key in ("p50_latency_secs", "p95_latency_secs", "model_calls", "input_tokens", "output_tokens",
+                "cached_tokens", "estimated_cost_usd"):
+        print(f"{key:<25} {_delta(summary[key], before.get(key))}")
+
+
+async def _evaluate(args, dataset: dict) -> dict:
+    import api
+    from evaluation.replay import Recording, install_recorder, install_replay, llm_agents
+
+    if not args.verbose:
+        logging.disable(logging.INFO)
+
+    recording = None
+    if args.record:
+        recording = Recording.load(args.recording) if os.path.exists(args.recording) else Recording()
+        install_recorder(api.get_root_agent(), recording)
+    elif not args.live:
+        if not os.path.exists(args.recording):
+            raise SystemExit(f"No recording at {args.recording}")
+        recording = Recording.load(args.recording)
+        agents = [agent.name for agent in llm_agents(api.get_root_agent())]
+        for case in dataset["cases"]:
+            missing = [name for name in agents if name not in recording.cases.get(case["id"], {})]
+            if case["id"] in recording.synthetic and missing:
+                raise SystemExit(
+                    f"The synthetic responses of {case['id']} do not cover {', '.join(missing)}: "
+                    "record the real models with --record"
+                )
+        install_replay(api.get_root_agent(), recording, args.replay_latency)
+
+    results = []
+    for case in dataset["cases"]:
+        if recording is not None:
+            recording.reset(case["id"], clear=args.record)
+        results.append(await run_case(case, recording))
+
+    if args.record:
+        recording.save(args.recording)
+    await api.http_pool.close_http_pool()
+    return {
+        "mode": "record" if args.record else "live" if args.live else "replay",
+        "summary": summarize(results),
+        "results": results,
+    }
+
+
+async def _write_golden(dataset: dict) -> None:
+    for case in dataset["cases"]:
+        case["expected"] = await expected_scores(PolicyRequest(**case["policy"]))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Offline evaluation and regression harness")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET, help="golden dataset file")
+    parser.add_argument("--recording", default=DEFAULT_RECORDING, help="recorded model responses")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--record", action="store_true", help="call the models and refresh the recording with their responses")
+    mode.add_argument("--live", action="store_true", help="call the models without recording")
+    mode.add_argument("--write-golden", action="store_true", help="recompute the expected scores from the tools")
+    parser.add_argument("--cases", help="comma-separated ids of the cases to run")
+    parser.add_argument("--replay-latency", type=float, default=0.0,
+                        help="fraction of the recorded model latency to wait on replay (default 0)")
+    parser.add_argument("--output", help="write the report to this file")
+    parser.add_argument("--baseline", help="report of a previous run to compare with")
+    parser.add_argument("--min-agreement", type=float, default=1.0,
+                        help="fail below this overall agreement (default 1.0)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--verbose", action="store_true", help="keep the application logs")
+    args = parser.parse_args()
+
+    dataset = load_dataset(args.dataset)
+    if args.write_golden:
+        asyncio.run(_write_golden(dataset))
+        write_dataset(args.dataset, dataset)
+        print(f"Wrote the expected scores of {len(dataset['cases'])} cases to {args.dataset}")
+        return 0
+
+    if args.cases:
+        selected = set(args.cases.split(","))
+        dataset["cases"] = [case for case in dataset["cases"] if case["id"] in selected]
+        if not dataset["cases"]:
+            parser.error(f"No case matches {args.cases}")
+
+    report = asyncio.run(_evaluate(args, dataset))
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        report["regressions"] = compare(report, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, baseline)
+        for regression in report.get("regressions", []):
+            print(f"REGRESSION {regression}")
+
+    failed = report["summary"]["overall_agreement"] < args.min_agreement or report.get("regressions")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
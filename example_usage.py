@@ -22,6 +22,7 @@ async def evaluate_policy_risk(policy_data: dict):
             - tariff_id: str - Tariff identifier
             - vehicle_brand: str - Vehicle brand
             - fiscal_code: str - Italian fiscal code
+            - vehicle_power_kw, yearly_mileage_km, usage_type: optional vehicle factors
 
     Returns:
         Risk evaluation result with individual and global risk scores
@@ -36,6 +37,9 @@ Please evaluate the insurance risk for the following policy application:
 City: {request.city}
 Tariff ID: {request.tariff_id}
 Vehicle Brand: {request.vehicle_brand}
+Vehicle Power: {f"{request.vehicle_power_kw} kW" if request.vehicle_power_kw is not None else "unknown"}
+Yearly Mileage: {f"{request.yearly_mileage_km} km" if request.yearly_mileage_km is not None else "unknown"}
+Usage Type: {request.usage_type.value if request.usage_type else "unknown"}
 Fiscal Code: {request.fiscal_code}
 
 Provide a complete risk evaluation.
@@ -61,6 +65,9 @@ if __name__ == "__main__":
         "city": "Milano",
         "tariff_id": "TARIFF_001",
         "vehicle_brand": "Ferrari",
+        "vehicle_power_kw": 456,
+        "yearly_mileage_km": 8000,
+        "usage_type": "PRIVATE",
         "fiscal_code": "RSSMRA80A01H501U"  # Has DUI, reckless driving, license suspension
     }
 
@@ -1,10 +1,13 @@
+import os
+
 from google.adk.agents import Agent, ParallelAgent, SequentialAgent
-from google.adk.models.lite_llm import LiteLlm
 from .sub_agents.geographic_risk_evaluator.agent import geographic_risk_evaluator
 from .sub_agents.vehicle_risk_evaluator.agent import vehicle_risk_evaluator
 from .sub_agents.person_risk_evaluator.agent import person_risk_evaluator
+from .sub_agents.global_evaluator.agent import global_evaluator as table_global_evaluator
 from .shared_libraries.types import RiskEvaluation
-from .shared_libraries.callbacks import rate_limit_callback
+from .shared_libraries.models import build_model
+from .shared_libraries.callbacks import rate_limit_callback, repair_structured_output_callback
 
 evaluators = ParallelAgent(
     name='parallel_agent',
@@ -12,8 +15,8 @@ evaluators = ParallelAgent(
     sub_agents=[geographic_risk_evaluator, vehicle_risk_evaluator, person_risk_evaluator]
 )
 
-global_evaluator = Agent(
-    model=LiteLlm(model='anthropic/claude-sonnet-4-20250514'),
+llm_global_evaluator = Agent(
+    model=build_model('anthropic/claude-sonnet-4-20250514'),
     name='global_evaluator',
     description="Final evaluators agent that combines all risk assessments",
     instruction="""
@@ -23,7 +26,7 @@ global_evaluator = Agent(
 
     You receive evaluations from three parallel agents:
     1. **geographic_risk**: Risk assessment based on the policy holder's address/location
-    2. **vehicle_risk**: Risk assessment based on the insured vehicle's brand
+    2. **vehicle_risk**: Risk assessment based on the insured vehicle (brand, power, yearly mileage, usage type)
     3. **person_risk**: Risk assessment based on the policy holder's judicial record
 
     Each evaluation contains:
@@ -55,9 +58,17 @@ global_evaluator = Agent(
     """,
     output_key="global_risk",
     output_schema=RiskEvaluation,
-    before_model_callback=rate_limit_callback
+    before_model_callback=rate_limit_callback,
+    after_model_callback=repair_structured_output_callback
 )
 
+# The global verdict is looked up in the precomputed verdict matrix; set
+# RISKEVAL_GLOBAL_EVALUATOR=llm to have the model write it for every request
+if os.getenv("RISKEVAL_GLOBAL_EVALUATOR", "table").lower() == "llm":
+    global_evaluator = llm_global_evaluator
+else:
+    global_evaluator = table_global_evaluator
+
 workflow_agent = SequentialAgent(
     name='root_agent',
     description="Insurance risk evaluation workflow: runs parallel evaluators (geographic, vehicle, person) then combines results in global evaluator",
@@ -0,0 +1,174 @@
+"""Adaptive admission control for agent workflow executions.
+
+Limits how many evaluations run at once and adapts that limit to the
+observed latency and provider throttling (AIMD: additive increase,
+multiplicative decrease). Requests over the limit wait in a bounded
+priority queue; when the queue is full they are rejected right away.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Admission priority classes; lower values are served first."""
+    INTERACTIVE = 0
+    BATCH = 1
+
+
+class AdmissionRejected(Exception):
+    """Raised when the admission queue is full."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Admission queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """AIMD concurrency limiter with a bounded priority queue.
+
+    Args:
+        initial_limit: Concurrency limit at startup.
+        min_limit: Lower bound of the adaptive limit.
+        max_limit: Upper bound of the adaptive limit.
+        max_queue: Maximum number of waiting requests.
+        batch_queue_fraction: Share of the queue batch requests may fill, so
+            interactive requests can still queue during batch runs.
+        target_latency: Executions slower than this (seconds) count as a
+            congestion signal.
+        decrease_factor: Multiplier applied to the limit on congestion.
+        decrease_cooldown: Minimum seconds between two decreases, so a burst
+            of slow completions halves the limit only once.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        max_queue: int = 100,
+        batch_queue_fraction: float = 0.5,
+        target_latency: float = 30.0,
+        decrease_factor: float = 0.5,
+        decrease_cooldown: float = 5.0,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.batch_queue_size = max(1, int(max_queue * batch_queue_fraction))
+        self.target_latency = target_latency
+        self.decrease_factor = decrease_factor
+        self.decrease_cooldown = decrease_cooldown
+
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+        self._in_flight = 0
+        self._queue: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._last_decrease = 0.0
+        self._avg_latency = target_latency / 2
+        self.rejected = 0
+        self.throttled = 0
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for _, _, future in self._queue if not future.done())
+
+    async def acquire(self, priority: Priority = Priority.INTERACTIVE) -> None:
+        """Waits for an execution slot.
+
+        Raises:
+            AdmissionRejected: If the queue for `priority` is full.
+        """
+        if self._in_flight < self.limit and not self.queued:
+            self._in_flight += 1
+            return
+
+        queued = self.queued
+        if queued >= self.max_queue or (priority >= Priority.BATCH and queued >= self.batch_queue_size):
+            self.rejected += 1
+            raise AdmissionRejected(self.retry_after())
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (int(priority), next(self._sequence), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted while we were being cancelled
+                self.release()
+            raise
+
+    def release(self) -> None:
+        """Returns an execution slot and admits queued requests."""
+        self._in_flight -= 1
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority = Priority.INTERACTIVE):
+        """Holds an execution slot and records its latency on exit."""
+        await self.acquire(priority)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record_latency(time.monotonic() - start)
+            self.release()
+
+    def record_latency(self, latency: float) -> None:
+        """Adapts the limit to the latency of a completed execution."""
+        self._avg_latency = 0.8 * self._avg_latency + 0.2 * latency
+        if latency > self.target_latency:
+            self._decrease("latency %.1fs over target" % latency)
+        else:
+            # Additive increase: about +1 per `limit` completions
+            self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+            self._wake()
+
+    def record_throttled(self) -> None:
+        """Signals a provider rate-limit (429) response."""
+        self.throttled += 1
+        self._decrease("provider throttling")
+
+    def _decrease(self, reason: str) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < self.decrease_cooldown:
+            return
+        self._last_decrease = now
+        self._limit = max(float(self.min_limit), self._limit * self.decrease_factor)
+        logger.warning("admission limit decreased to %i (%s)", self.limit, reason)
+
+    def _wake(self) -> None:
+        while self._queue and self._in_flight < self.limit:
+            _, _, future = heapq.heappop(self._queue)
+            if future.done():
+                continue
+            self._in_flight += 1
+            future.set_result(None)
+
+    def retry_after(self) -> int:
+        """Estimates in seconds when a rejected request could be admitted."""
+        waves = (self.queued + 1) / self.limit
+        return int(min(60, max(1, math.ceil(waves * self._avg_latency))))
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "in_flight": self._in_flight,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "throttled": self.throttled,
+            "avg_latency_secs": round(self._avg_latency, 3),
+        }
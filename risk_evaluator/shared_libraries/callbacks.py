@@ -14,11 +14,24 @@
 
 """Callback functions for FOMC Research Agent."""
 
+import json
 import logging
 import time
+from typing import Optional, Sequence
 
 from google.adk.agents.callback_context import CallbackContext
-from google.adk.models import LlmRequest
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+from . import parsing
+from .state import (
+    DEGRADED_STATE_PREFIX,
+    PARSE_FAILED_STATE_PREFIX,
+    POLICY_REQUEST_STATE_KEY,
+    REQUEST_ID_STATE_KEY,
+    dimension_registry,
+)
+from .types import RiskEvaluation, RiskScore
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -73,3 +86,158 @@ def rate_limit_callback(
         callback_context.state["request_count"] = request_count
 
     return
+
+
+def _dimension_key(
+    callback_context: CallbackContext, output_key: str, key_fields: Sequence[str]
+) -> Optional[tuple]:
+    policy_request = callback_context.state.get(POLICY_REQUEST_STATE_KEY)
+    if not policy_request or REQUEST_ID_STATE_KEY not in callback_context.state:
+        return None
+    return (output_key,) + tuple(
+        str(policy_request.get(field) or "").strip().lower() for field in key_fields
+    )
+
+
+def make_coalescing_callbacks(output_key: str, key_fields: Sequence[str]):
+    """Builds agent callbacks that coalesce identical per-dimension evaluations.
+
+    The first request evaluating a dimension (e.g. the geographic risk of a
+    city/tariff pair) becomes the leader; concurrent requests with the same
+    inputs wait for the leader's result and skip their own agent run. When
+    the leader fails, waiting requests fall back to running the agent.
+
+    Args:
+      output_key: The state key the agent writes its evaluation to.
+      key_fields: The `PolicyRequest` fields the evaluation depends on.
+
+    Returns:
+      A (before_agent_callback, after_agent_callback) pair.
+    """
+
+    async def before_agent_callback(
+        callback_context: CallbackContext,
+    ) -> Optional[types.Content]:
+        key = _dimension_key(callback_context, output_key, key_fields)
+        if key is None:
+            return None
+        owner = callback_context.state[REQUEST_ID_STATE_KEY]
+        future = dimension_registry.claim(key, owner)
+        if future is None:
+            return None
+
+        logger.debug("coalescing %s evaluation with an in-flight request", output_key)
+        result = await dimension_registry.wait(future)
+        if result is None:
+            return None
+        callback_context.state[output_key] = result
+        return types.Content(role="model", parts=[types.Part(text=json.dumps(result))])
+
+    def after_agent_callback(callback_context: CallbackContext) -> None:
+        key = _dimension_key(callback_context, output_key, key_fields)
+        if key is None:
+            return None
+        owner = callback_context.state[REQUEST_ID_STATE_KEY]
+        agent_name = callback_context.agent_name
+        if (callback_context.state.get(PARSE_FAILED_STATE_PREFIX + agent_name)
+                or callback_context.state.get(DEGRADED_STATE_PREFIX + agent_name)):
+            # Don't hand a placeholder to the followers, let them run instead
+            dimension_registry.abandon(key, owner)
+            return None
+        result = callback_context.state.get(output_key)
+        if result is not None:
+            dimension_registry.resolve(key, owner, result)
+        return None
+
+    return before_agent_callback, after_agent_callback
+
+
+def _clear_parse_failure(callback_context: CallbackContext, agent_name: str) -> None:
+    # A re-ask runs in the same session: once it answers properly, the flag
+    # of the failed first answer must not make the result look failed again
+    key = PARSE_FAILED_STATE_PREFIX + agent_name
+    if callback_context.state.get(key):
+        callback_context.state[key] = False
+
+
+def repair_structured_output_callback(
+    callback_context: CallbackContext, llm_response: LlmResponse
+) -> Optional[LlmResponse]:
+    """Repairs the final structured answer of an agent before ADK validates it.
+
+    Malformed JSON (markdown fences, trailing commas, loosely spelled scores)
+    is rewritten as a canonical `RiskEvaluation`. Output that cannot be
+    recovered is replaced by a NOT_AVAILABLE placeholder and flagged in state
+    so the caller can re-ask only that agent instead of failing the request;
+    a later valid answer of the agent clears the flag.
+
+    Args:
+      callback_context: A CallbackContext object representing the active
+              callback context.
+      llm_response: The LlmResponse returned by the model.
+    """
+    content = llm_response.content
+    if llm_response.partial or not content or not content.parts:
+        return None
+    if any(part.function_call for part in content.parts):
+        return None
+    text = "".join(part.text or "" for part in content.parts)
+    if not text.strip():
+        return None
+
+    agent_name = callback_context.agent_name
+    try:
+        RiskEvaluation.model_validate_json(text)
+        _clear_parse_failure(callback_context, agent_name)
+        return None
+    except ValueError:
+        pass
+
+    try:
+        evaluation, _ = parsing.parse_risk_evaluation(text)
+        parsing.repair_counts[agent_name] += 1
+        logger.info("repaired structured output of %s", agent_name)
+        _clear_parse_failure(callback_context, agent_name)
+    except parsing.RiskEvaluationParseError as e:
+        parsing.failure_counts[agent_name] += 1
+        logger.warning("unrecoverable structured output from %s: %s", agent_name, e)
+        callback_context.state[PARSE_FAILED_STATE_PREFIX + agent_name] = True
+        evaluation = RiskEvaluation(
+            score=RiskScore.NOT_AVAILABLE,
+            evaluation=f"The evaluation could not be parsed from the model output: {e}"
+        )
+
+    llm_response.content = types.Content(
+        role=content.role or "model",
+        parts=[types.Part(text=evaluation.model_dump_json())]
+    )
+    return llm_response
+
+
+def degrade_on_model_error_callback(
+    callback_context: CallbackContext, llm_request: LlmRequest, error: Exception
+) -> Optional[LlmResponse]:
+    # pylint: disable=unused-argument
+    """Turns a model failure of a sub-evaluator into a NOT_AVAILABLE evaluation.
+
+    Model calls are already retried by the resilient client; once they are
+    exhausted (or the circuit is open) the failing dimension is reported as
+    NOT_AVAILABLE so the sibling evaluations are kept and the global
+    evaluator proceeds with the available data.
+
+    Args:
+      callback_context: A CallbackContext object representing the active
+              callback context.
+      llm_request: A LlmRequest object representing the failed LLM request.
+      error: The exception raised by the model call.
+    """
+    agent_name = callback_context.agent_name
+    logger.warning("model call of %s failed, degrading to NOT_AVAILABLE: %s", agent_name, error)
+    callback_context.state[DEGRADED_STATE_PREFIX + agent_name] = True
+    evaluation = RiskEvaluation(
+        score=RiskScore.NOT_AVAILABLE,
+        evaluation=f"The evaluation could not be completed because the model is unavailable: {error}"
+    )
+    return LlmResponse(
+        content=types.Content(role="model", parts=[types.Part(text=evaluation.model_dump_json())])
+    )
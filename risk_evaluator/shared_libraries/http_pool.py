@@ -0,0 +1,317 @@
+"""Shared, pooled HTTP transport for the LiteLLM model calls.
+
+Every agent's model client sends its requests through one LiteLLM
+AsyncHTTPHandler, also installed as `litellm.aclient_session` for the
+OpenAI-compatible providers, so connections (and their TLS sessions) opened by one
+agent are reused by the others instead of being set up again on every call.
+The pool is sized and timed out through environment variables:
+
+- RISKEVAL_HTTP_MAX_CONNECTIONS: open connections, idle or busy (default 100)
+- RISKEVAL_HTTP_MAX_CONNECTIONS_PER_HOST: the same, per provider host
+  (default 0, no per-host limit); HTTP/1.1 only, httpx has no per-host limit
+- RISKEVAL_HTTP_KEEPALIVE_EXPIRY_SECS: idle time before a connection is
+  closed (default 60)
+- RISKEVAL_HTTP_CONNECT_TIMEOUT_SECS (default 10),
+  RISKEVAL_HTTP_READ_TIMEOUT_SECS (default 600, long generations),
+  RISKEVAL_HTTP_POOL_TIMEOUT_SECS: wait for a free connection (default 30)
+- RISKEVAL_HTTP2: "1" negotiates HTTP/2 with the providers supporting it
+  (needs the `h2` package); default "0"
+- RISKEVAL_HTTP_WARMUP_TIMEOUT_SECS: time allowed to `warm_connections`
+  per provider host (default 5)
+
+By default the pool is an aiohttp connection pool (HTTP/1.1 keep-alive),
+LiteLLM's fastest transport. HTTP/2 goes through httpx instead, which
+multiplexes the concurrent calls of a request over fewer connections but
+costs more CPU per call; measure both with benchmarks/llm_connection_pool.py.
+
+Requests, connection set-ups and waits for a free connection are counted
+through the public trace hooks of aiohttp and httpcore, and reported by
+`get_http_pool_stats`. Idle connections are not: neither client exposes
+them without reaching into its private state.
+"""
+
+import asyncio
+import importlib.util
+import logging
+import os
+import time
+from collections import Counter
+from typing import TYPE_CHECKING, Optional
+
+import httpx
+
+if TYPE_CHECKING:
+    from litellm.llms.custom_httpx.http_handler import AsyncHTTPHandler
+
+logger = logging.getLogger(__name__)
+
+MAX_CONNECTIONS = int(os.getenv("RISKEVAL_HTTP_MAX_CONNECTIONS", "100"))
+MAX_CONNECTIONS_PER_HOST = int(os.getenv("RISKEVAL_HTTP_MAX_CONNECTIONS_PER_HOST", "0"))
+KEEPALIVE_EXPIRY_SECS = float(os.getenv("RISKEVAL_HTTP_KEEPALIVE_EXPIRY_SECS", "60"))
+CONNECT_TIMEOUT_SECS = float(os.getenv("RISKEVAL_HTTP_CONNECT_TIMEOUT_SECS", "10"))
+READ_TIMEOUT_SECS = float(os.getenv("RISKEVAL_HTTP_READ_TIMEOUT_SECS", "600"))
+POOL_TIMEOUT_SECS = float(os.getenv("RISKEVAL_HTTP_POOL_TIMEOUT_SECS", "30"))
+WARMUP_TIMEOUT_SECS = float(os.getenv("RISKEVAL_HTTP_WARMUP_TIMEOUT_SECS", "5"))
+
+# Default API base of the providers, for the hosts `warm_connections` opens;
+# <PROVIDER>_API_BASE overrides them, as it does in LiteLLM
+PROVIDER_API_BASES = {
+    "anthropic": "https://api.anthropic.com",
+    "openai": "https://api.openai.com",
+    "gemini": "https://generativelanguage.googleapis.com",
+}
+
+TIMEOUT = httpx.Timeout(
+    connect=CONNECT_TIMEOUT_SECS,
+    read=READ_TIMEOUT_SECS,
+    write=CONNECT_TIMEOUT_SECS,
+    pool=POOL_TIMEOUT_SECS,
+)
+
+
+def http2_enabled() -> bool:
+    """Tells whether HTTP/2 is negotiated, per RISKEVAL_HTTP2 and the `h2` package."""
+    if os.getenv("RISKEVAL_HTTP2", "0").lower() not in ("1", "true", "yes"):
+        return False
+    if importlib.util.find_spec("h2") is None:
+        logger.warning("RISKEVAL_HTTP2 is set but the h2 package is missing, using HTTP/1.1")
+        return False
+    return True
+
+
+class PoolMetrics:
+    """Request and connection counters of the shared pool."""
+
+    def __init__(self):
+        self.created_at = time.monotonic()
+        self.requests = 0
+        self.in_flight = 0
+        self.failures = 0
+        self.connections_opened = 0
+        self.connection_waits = 0
+        self.http_versions: Counter = Counter()
+
+    def request_started(self) -> None:
+        self.requests += 1
+        self.in_flight += 1
+
+    def request_ended(self, failed: bool = False) -> None:
+        self.in_flight -= 1
+        if failed:
+            self.failures += 1
+
+    def to_dict(self) -> dict:
+        return {
+            "uptime_secs": round(time.monotonic() - self.created_at, 1),
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "failures": self.failures,
+            "connections_opened": self.connections_opened,
+            "connection_waits": self.connection_waits,
+            "reuse_ratio": round(1 - self.connections_opened / self.requests, 3) if self.requests else None,
+            "http_versions": dict(self.http_versions),
+        }
+
+
+def _aiohttp_session(metrics: PoolMetrics):
+    """Builds the aiohttp session of the HTTP/1.1 pool, reporting into `metrics`."""
+    import aiohttp
+
+    async def on_request_start(session, context, params):
+        metrics.request_started()
+
+    async def on_request_end(session, context, params):
+        metrics.http_versions["HTTP/%i.%i" % tuple(params.response.version)] += 1
+        metrics.request_ended()
+
+    async def on_request_exception(session, context, params):
+        metrics.request_ended(failed=True)
+
+    async def on_connection_create_end(session, context, params):
+        metrics.connections_opened += 1
+
+    async def on_connection_queued_start(session, context, params):
+        metrics.connection_waits += 1
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(on_request_start)
+    trace.on_request_end.append(on_request_end)
+    trace.on_request_exception.append(on_request_exception)
+    trace.on_connection_create_end.append(on_connection_create_end)
+    trace.on_connection_queued_start.append(on_connection_queued_start)
+
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(
+            limit=MAX_CONNECTIONS,
+            limit_per_host=MAX_CONNECTIONS_PER_HOST,
+            keepalive_timeout=KEEPALIVE_EXPIRY_SECS,
+            ttl_dns_cache=300,
+        ),
+        cookie_jar=aiohttp.DummyCookieJar(),
+        trace_configs=[trace],
+    )
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    """Response body calling `on_close` once, when it is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, on_close):
+        self._stream = stream
+        self._on_close = on_close
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        if self._on_close is not None:
+            self._on_close()
+            self._on_close = None
+        await self._stream.aclose()
+
+
+class InstrumentedHTTP2Transport(httpx.AsyncHTTPTransport):
+    """httpx connection pool with HTTP/2, reporting into a PoolMetrics.
+
+    Connection waits are not counted: httpcore does not trace them.
+    """
+
+    def __init__(self, metrics: PoolMetrics):
+        super().__init__(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY_SECS,
+            ),
+        )
+        self.metrics = metrics
+
+    async def _trace(self, event_name: str, info: dict) -> None:
+        # connect_tcp only happens when no pooled connection could be reused
+        if event_name == "connection.connect_tcp.complete":
+            self.metrics.connections_opened += 1
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request.extensions["trace"] = self._trace
+        self.metrics.request_started()
+        try:
+            response = await super().handle_async_request(request)
+        except Exception:
+            self.metrics.request_ended(failed=True)
+            raise
+        self.metrics.http_versions[response.extensions.get("http_version", b"HTTP/1.1").decode()] += 1
+        # The request stays in flight until its (possibly streamed) body is closed
+        response.stream = _TrackedStream(response.stream, self.metrics.request_ended)
+        return response
+
+
+_handler: Optional["AsyncHTTPHandler"] = None
+_session = None
+_metrics: Optional[PoolMetrics] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_http_handler() -> "AsyncHTTPHandler":
+    """Returns the LiteLLM handler shared by all model calls, creating it on first use.
+
+    The handler's client is installed as `litellm.aclient_session` when the
+    handler is created. Must be called from the event loop serving the model
+    calls; a handler created on another loop is replaced.
+    """
+    global _handler, _session, _metrics, _loop
+    loop = asyncio.get_running_loop()
+    if _handler is not None and _loop is loop and not _handler.client.is_closed:
+        return _handler
+
+    import litellm
+    from litellm.llms.custom_httpx.http_handler import AsyncHTTPHandler
+
+    _metrics = PoolMetrics()
+    _loop = loop
+    if http2_enabled():
+        if MAX_CONNECTIONS_PER_HOST:
+            logger.warning("RISKEVAL_HTTP_MAX_CONNECTIONS_PER_HOST is ignored with HTTP/2")
+        _session = None
+        _handler = AsyncHTTPHandler()
+        # The setter swaps in our client and leaves closing it to us
+        _handler.client = httpx.AsyncClient(
+            transport=InstrumentedHTTP2Transport(_metrics), timeout=TIMEOUT, follow_redirects=True
+        )
+    else:
+        _session = _aiohttp_session(_metrics)
+        _handler = AsyncHTTPHandler(timeout=TIMEOUT, shared_session=_session)
+    # OpenAI-compatible providers build their SDK client on top of aclient_session
+    litellm.aclient_session = _handler.client
+    logger.info(
+        "HTTP pool created (max %i connections, keep-alive %.0fs, http2=%s)",
+        MAX_CONNECTIONS, KEEPALIVE_EXPIRY_SECS, _session is None
+    )
+    return _handler
+
+
+def provider_api_base(model: str) -> Optional[str]:
+    """Returns the API base a LiteLLM model is called on, None for unknown providers."""
+    provider = model.split("/", 1)[0]
+    return os.getenv(f"{provider.upper()}_API_BASE") or PROVIDER_API_BASES.get(provider)
+
+
+async def warm_connections(models) -> int:
+    """Opens a keep-alive connection to the API host of every model, in the shared pool.
+
+    Sends one HEAD request per host, so the TCP and TLS set-up is paid before
+    the first model call; whatever the HTTP status, the connection stays in
+    the pool for the keep-alive expiry. The requests show in the pool stats.
+    Unreachable hosts are logged and skipped.
+
+    Args:
+        models: LiteLLM model names (e.g. 'anthropic/claude-sonnet-4-20250514').
+
+    Returns:
+        The number of hosts a connection was opened to.
+    """
+    client = get_http_handler().client
+    bases = sorted({base for base in map(provider_api_base, models) if base})
+
+    async def warm(base: str) -> bool:
+        try:
+            await asyncio.wait_for(client.head(base), WARMUP_TIMEOUT_SECS)
+        except Exception as e:
+            logger.warning("Could not open a connection to %s: %r", base, e)
+            return False
+        return True
+
+    return sum(await asyncio.gather(*(warm(base) for base in bases)))
+
+
+async def close_http_pool() -> None:
+    """Closes the shared handler and its connections."""
+    global _handler, _session
+    if _handler is not None:
+        import litellm
+
+        if litellm.aclient_session is _handler.client:
+            litellm.aclient_session = None
+        await _handler.client.aclose()
+        _handler = None
+    if _session is not None:
+        await _session.close()
+        _session = None
+
+
+def get_http_pool_stats() -> dict:
+    """Returns the configuration, counters and current state of the shared pool."""
+    created = _handler is not None and not _handler.client.is_closed
+    http2 = http2_enabled()
+    stats = {
+        "created": created,
+        "transport": "httpx-http2" if http2 else "aiohttp-http1.1",
+        "max_connections": MAX_CONNECTIONS,
+        "max_connections_per_host": None if http2 else MAX_CONNECTIONS_PER_HOST,
+        "keepalive_expiry_secs": KEEPALIVE_EXPIRY_SECS,
+    }
+    if created:
+        stats.update(_metrics.to_dict())
+        # On HTTP/1.1 every request in flight holds a connection; HTTP/2
+        # multiplexes them, so the share of the pool in use is not known
+        stats["utilization"] = None if http2 else round(_metrics.in_flight / MAX_CONNECTIONS, 3)
+    return stats
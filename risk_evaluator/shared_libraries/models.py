@@ -0,0 +1,42 @@
+"""Factory for the model clients used by the agents."""
+
+from google.adk.models.lite_llm import LiteLlm, LiteLLMClient
+
+from .http_pool import TIMEOUT, get_http_handler
+from .resilience import call_with_retries
+
+# Providers whose LiteLLM handler accepts an AsyncHTTPHandler as `client`
+_HANDLER_CLIENT_PROVIDERS = {"anthropic"}
+
+
+def _use_shared_pool(model: str, kwargs: dict) -> None:
+    # Creating the handler installs it as litellm.aclient_session for the
+    # OpenAI-compatible providers; the native HTTP providers take it as `client`
+    handler = get_http_handler()
+    if model.split("/", 1)[0] in _HANDLER_CLIENT_PROVIDERS:
+        kwargs.setdefault("client", handler)
+    kwargs.setdefault("timeout", TIMEOUT)
+
+
+class ResilientLiteLLMClient(LiteLLMClient):
+    """LiteLLM client retrying transient failures of `acompletion`.
+
+    For streaming calls only the initial request is retried: once chunks
+    have been handed to the agent the call can no longer be replayed.
+    All calls share the pooled HTTP client of `http_pool`.
+    """
+
+    async def acompletion(self, model, messages, tools, **kwargs):
+        _use_shared_pool(model, kwargs)
+        return await call_with_retries(
+            model, lambda: super(ResilientLiteLLMClient, self).acompletion(model, messages, tools, **kwargs)
+        )
+
+
+def build_model(model: str) -> LiteLlm:
+    """Builds the LiteLlm client of an agent.
+
+    Args:
+      model: The LiteLLM model name (e.g. 'anthropic/claude-sonnet-4-20250514').
+    """
+    return LiteLlm(model=model, llm_client=ResilientLiteLLMClient())
@@ -0,0 +1,187 @@
+"""Tolerant parsing of the agents' structured `RiskEvaluation` output.
+
+Models occasionally wrap their JSON in markdown fences, add a sentence around
+it, leave trailing commas or spell the score as "Very High". These helpers
+recover a valid `RiskEvaluation` from such output and keep per-agent counters
+of how often a repair (or a re-ask) was needed.
+"""
+
+import json
+import re
+from collections import Counter
+from typing import Any, Tuple
+
+from pydantic import ValidationError
+
+from .types import RiskEvaluation, RiskScore
+
+
+class RiskEvaluationParseError(ValueError):
+    """Raised when a model output cannot be turned into a `RiskEvaluation`."""
+
+
+# Per-agent counters, exposed by the API
+repair_counts: Counter = Counter()
+failure_counts: Counter = Counter()
+reask_counts: Counter = Counter()
+
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+_SCORE_SEPARATORS_RE = re.compile(r"[\s\-_/]+")
+
+_SCORE_ALIASES = {
+    "VERYHIGH": RiskScore.VERY_HIGH,
+    "MODERATE": RiskScore.MEDIUM,
+    "NOTAVAILABLE": RiskScore.NOT_AVAILABLE,
+    "NA": RiskScore.NOT_AVAILABLE,
+    "N_A": RiskScore.NOT_AVAILABLE,
+    "UNAVAILABLE": RiskScore.NOT_AVAILABLE,
+    "UNKNOWN": RiskScore.NOT_AVAILABLE,
+}
+
+
+def normalize_score(value: Any) -> RiskScore:
+    """Maps a loosely formatted score (e.g. "very high", "Very-High") to `RiskScore`.
+
+    Raises:
+        RiskEvaluationParseError: If the value does not name a known score.
+    """
+    if isinstance(value, RiskScore):
+        return value
+    text = str(value).strip().strip("'\"").upper()
+    try:
+        return RiskScore(text)
+    except ValueError:
+        pass
+    underscored = _SCORE_SEPARATORS_RE.sub("_", text)
+    try:
+        return RiskScore(underscored)
+    except ValueError:
+        pass
+    compact = underscored.replace("_", "")
+    if compact in _SCORE_ALIASES:
+        return _SCORE_ALIASES[compact]
+    if underscored in _SCORE_ALIASES:
+        return _SCORE_ALIASES[underscored]
+    raise RiskEvaluationParseError(f"Unknown risk score '{value}'")
+
+
+def _first_json_object(text: str) -> str:
+    """Returns the first balanced {...} block of `text`, honouring strings."""
+    start = text.find("{")
+    if start < 0:
+        raise RiskEvaluationParseError("No JSON object found in model output")
+    depth = 0
+    in_string = False
+    quote = ""
+    escaped = False
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == quote:
+                in_string = False
+        elif char in ("\"", "'"):
+            in_string = True
+            quote = char
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:index + 1]
+    # Unterminated object: close it and let the repair step have a go
+    return text[start:] + "}" * depth
+
+
+def _repair_json(candidate: str) -> str:
+    candidate = (
+        candidate.replace("“", "\"").replace("”", "\"")
+        .replace("‘", "'").replace("’", "'")
+    )
+    candidate = _TRAILING_COMMA_RE.sub(r"\1", candidate)
+    if "\"" not in candidate:
+        candidate = candidate.replace("'", "\"")
+    candidate = re.sub(r"\bTrue\b", "true", candidate)
+    candidate = re.sub(r"\bFalse\b", "false", candidate)
+    candidate = re.sub(r"\bNone\b", "null", candidate)
+    return candidate
+
+
+def extract_json(text: str) -> Tuple[dict, bool]:
+    """Extracts a JSON object from free-form model output.
+
+    Returns:
+        A (data, repaired) tuple; `repaired` is False when `text` was already
+        a plain JSON object.
+
+    Raises:
+        RiskEvaluationParseError: If no JSON object can be recovered.
+    """
+    try:
+        data = json.loads(text)
+        if isinstance(data, dict):
+            return data, False
+    except ValueError:
+        pass
+
+    fenced = _FENCE_RE.search(text)
+    candidate = _first_json_object(fenced.group(1) if fenced else text)
+    for attempt in (candidate, _repair_json(candidate)):
+        try:
+            data = json.loads(attempt)
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            return data, True
+    raise RiskEvaluationParseError("Model output is not valid JSON")
+
+
+def parse_risk_evaluation(raw: Any) -> Tuple[RiskEvaluation, bool]:
+    """Builds a `RiskEvaluation` from a dict, a JSON string or free-form text.
+
+    Returns:
+        A (evaluation, repaired) tuple; `repaired` tells whether the raw
+        output needed any fix to validate.
+
+    Raises:
+        RiskEvaluationParseError: If the output cannot be recovered.
+    """
+    if isinstance(raw, RiskEvaluation):
+        return raw, False
+    if isinstance(raw, str):
+        data, repaired = extract_json(raw)
+    elif isinstance(raw, dict):
+        data, repaired = raw, False
+    else:
+        raise RiskEvaluationParseError(f"Unsupported output type {type(raw).__name__}")
+
+    try:
+        return RiskEvaluation.model_validate(data), repaired
+    except ValidationError:
+        pass
+
+    # Tolerate casing of the keys and loosely formatted scores
+    lowered = {str(key).strip().lower(): value for key, value in data.items()}
+    if "score" not in lowered:
+        raise RiskEvaluationParseError("Model output has no 'score' field")
+    evaluation = lowered.get("evaluation", lowered.get("reason", ""))
+    try:
+        return RiskEvaluation(
+            score=normalize_score(lowered["score"]),
+            evaluation=str(evaluation) if evaluation is not None else ""
+        ), True
+    except ValidationError as e:
+        raise RiskEvaluationParseError(str(e)) from e
+
+
+def get_parse_stats() -> dict:
+    """Returns the per-agent repair, failure and re-ask counters."""
+    return {
+        "repaired": dict(repair_counts),
+        "failed": dict(failure_counts),
+        "reasked": dict(reask_counts),
+    }
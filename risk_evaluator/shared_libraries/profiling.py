@@ -0,0 +1,351 @@
+"""On-demand profiling of the serving process.
+
+A profiling window, started through the admin API for a bounded time
+(at most RISKEVAL_PROFILE_MAX_SECS, default 300), runs together:
+
+- a sampling profiler: a thread snapshots the Python stack of every thread
+  each `interval_ms` and counts the stacks, reported in the folded format
+  read by flamegraph.pl, speedscope and most flamegraph viewers. Idle
+  stacks (event loop waiting in select, pool workers waiting for work) are
+  dropped unless `include_idle` is set, so the profile shows where the CPU
+  goes.
+- an event loop lag monitor: a task measuring how late its periodic wake-ups
+  are, i.e. how long the loop was blocked by synchronous code
+- a per-request timeline of the phases of each evaluation started in the
+  window: session creation, every `runner.run_async` event, tool executions
+  and model waits (the last two from `profiling_plugin.ProfilingPlugin`),
+  at most RISKEVAL_PROFILE_MAX_REQUESTS requests (default 500)
+
+When no window is open the hooks only test a module global, so their cost
+is negligible.
+
+This module is imported by the API at startup, so it must stay free of
+heavy dependencies (google.adk, litellm).
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MAX_SECS = float(os.getenv("RISKEVAL_PROFILE_MAX_SECS", "300"))
+PROFILE_MAX_REQUESTS = int(os.getenv("RISKEVAL_PROFILE_MAX_REQUESTS", "500"))
+LOOP_LAG_INTERVAL_SECS = 0.05
+
+# Timeline phases
+SESSION_CREATION = "session_creation"
+RUN_ASYNC_EVENT = "run_async_event"
+TOOL_EXECUTION = "tool_execution"
+MODEL_WAIT = "model_wait"
+
+# (file name, function) of the innermost frames of a thread waiting for work
+_IDLE_LEAVES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("thread.py", "_worker"),
+    ("queue.py", "get"),
+}
+
+
+class ProfilingError(RuntimeError):
+    """Raised when a profiling window cannot be started."""
+
+
+def _frame_label(code) -> str:
+    path = code.co_filename.replace(os.sep, "/").rsplit("/", 2)
+    return f"{code.co_name} ({'/'.join(path[-2:])}:{code.co_firstlineno})"
+
+
+class StackSampler(threading.Thread):
+    """Counts the Python stacks of all threads, sampled every `interval` seconds."""
+
+    def __init__(self, interval: float, include_idle: bool = False):
+        super().__init__(name="riskeval-profiler", daemon=True)
+        self.interval = interval
+        self.include_idle = include_idle
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        own = threading.get_ident()
+        names: Dict[int, str] = {}
+        while not self._stopped.wait(self.interval):
+            frames = sys._current_frames()
+            if frames.keys() - names.keys():
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in frames.items():
+                if ident == own:
+                    continue
+                code = frame.f_code
+                if not self.include_idle and (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                stack.reverse()
+                self.stacks[(names.get(ident, str(ident)), tuple(stack))] += 1
+            self.samples += 1
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+    def folded(self) -> str:
+        """The stacks in folded format: `thread;outer;...;inner count` per line."""
+        lines = {}
+        for (thread, stack), count in self.stacks.items():
+            line = ";".join([thread.replace(";", "_")] + [_frame_label(code) for code in stack])
+            lines[line] = lines.get(line, 0) + count
+        return "".join(f"{line} {count}\n" for line, count in sorted(lines.items()))
+
+    def top_functions(self, limit: int = 20) -> List[dict]:
+        """Functions at the top of the most samples (self time)."""
+        leaves: Counter = Counter()
+        for (_, stack), count in self.stacks.items():
+            if stack:
+                leaves[_frame_label(stack[-1])] += count
+        total = sum(leaves.values())
+        return [
+            {"function": label, "samples": count, "share": round(count / total, 3)}
+            for label, count in leaves.most_common(limit)
+        ]
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop runs a callback scheduled every `interval` seconds."""
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL_SECS):
+        self.interval = interval
+        self.lags: List[float] = []
+        self.worst: List[Tuple[float, float]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        started = time.perf_counter()
+        while True:
+            before = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - before - self.interval)
+            self.lags.append(lag)
+            if lag >= 0.1:
+                self.worst.append((round(before - started, 3), lag))
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def to_dict(self) -> dict:
+        lags = sorted(self.lags)
+
+        def percentile(p: float) -> Optional[float]:
+            if not lags:
+                return None
+            return round(lags[min(len(lags) - 1, int(len(lags) * p))] * 1000, 3)
+
+        return {
+            "interval_ms": self.interval * 1000,
+            "samples": len(lags),
+            "mean_ms": round(sum(lags) / len(lags) * 1000, 3) if lags else None,
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "max_ms": round(lags[-1] * 1000, 3) if lags else None,
+            "stalls_over_100ms": [
+                {"at_secs": at, "lag_ms": round(lag * 1000, 3)}
+                for at, lag in sorted(self.worst, key=lambda stall: -stall[1])[:20]
+            ],
+        }
+
+
+class RequestTimeline:
+    """Phases of one evaluation, as (phase, name, start, end) spans."""
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.started = time.perf_counter()
+        self.ended: Optional[float] = None
+        self.spans: List[Tuple[str, str, float, float]] = []
+        self._open: Dict[tuple, float] = {}
+
+    def add(self, phase: str, name: str, start: float) -> float:
+        """Adds a span from `start` to now; returns now, the start of the next span."""
+        end = time.perf_counter()
+        self.spans.append((phase, name, start, end))
+        return end
+
+    def begin(self, key: tuple) -> None:
+        self._open[key] = time.perf_counter()
+
+    def end(self, key: tuple, phase: str, name: str) -> None:
+        start = self._open.pop(key, None)
+        if start is not None:
+            self.add(phase, name, start)
+
+    def finish(self) -> None:
+        self.ended = time.perf_counter()
+
+    def to_dict(self) -> dict:
+        phases: Dict[str, dict] = {}
+        for phase, _, start, end in self.spans:
+            totals = phases.setdefault(phase, {"count": 0, "total_ms": 0.0})
+            totals["count"] += 1
+            totals["total_ms"] += (end - start) * 1000
+        for totals in phases.values():
+            totals["total_ms"] = round(totals["total_ms"], 3)
+        return {
+            "request_id": self.request_id,
+            "wall_time_ms": round((self.ended - self.started) * 1000, 3) if self.ended else None,
+            # Tool executions and model waits of parallel agents overlap
+            "phases": phases,
+            "spans": [
+                {
+                    "phase": phase,
+                    "name": name,
+                    "start_ms": round((start - self.started) * 1000, 3),
+                    "duration_ms": round((end - start) * 1000, 3),
+                }
+                for phase, name, start, end in sorted(self.spans, key=lambda span: span[2])
+            ],
+        }
+
+
+class ProfilingSession:
+    """A profiling window: sampler, loop lag monitor and request timelines."""
+
+    def __init__(self, duration: float, interval: float, include_idle: bool):
+        self.duration = duration
+        self.started_at = datetime.now(timezone.utc)
+        self.started = time.perf_counter()
+        self.sampler = StackSampler(interval, include_idle)
+        self.loop_lag = LoopLagMonitor()
+        self.timelines: Dict[str, RequestTimeline] = {}
+        self.dropped_requests = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def start(self) -> None:
+        self.sampler.start()
+        self.loop_lag.start()
+        self._timer = asyncio.get_running_loop().call_later(self.duration, stop_profiling)
+
+    def stop(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        self.loop_lag.stop()
+        self.sampler.stop()
+
+    def report(self) -> dict:
+        return {
+            "started_at": self.started_at.isoformat(),
+            "duration_secs": round(time.perf_counter() - self.started, 3),
+            "sampler": {
+                "interval_ms": self.sampler.interval * 1000,
+                "include_idle": self.sampler.include_idle,
+                "samples": self.sampler.samples,
+                "stacks": len(self.sampler.stacks),
+                "top_functions": self.sampler.top_functions(),
+            },
+            "loop_lag": self.loop_lag.to_dict(),
+            "requests": [timeline.to_dict() for timeline in self.timelines.values()],
+            "dropped_requests": self.dropped_requests,
+        }
+
+
+_session: Optional[ProfilingSession] = None
+_last_report: Optional[dict] = None
+_last_folded: Optional[str] = None
+
+
+def start_profiling(duration_secs: float, interval_ms: float = 10.0, include_idle: bool = False) -> dict:
+    """Opens a profiling window of `duration_secs`; must be called on the serving event loop.
+
+    Raises:
+        ProfilingError: if a window is already open or the arguments are out of range.
+    """
+    global _session
+    if _session is not None:
+        raise ProfilingError("A profiling window is already open")
+    if not 0 < duration_secs <= PROFILE_MAX_SECS:
+        raise ProfilingError(f"duration_secs must be between 0 and {PROFILE_MAX_SECS:g}")
+    if not 1 <= interval_ms <= 1000:
+        raise ProfilingError("interval_ms must be between 1 and 1000")
+    _session = ProfilingSession(duration_secs, interval_ms / 1000, include_idle)
+    _session.start()
+    logger.info("Profiling window opened for %.1fs (sampling every %.0fms)", duration_secs, interval_ms)
+    return get_profiling_status()
+
+
+def stop_profiling() -> Optional[dict]:
+    """Closes the open profiling window, if any, and returns its report."""
+    global _session, _last_report, _last_folded
+    session = _session
+    if session is None:
+        return None
+    _session = None
+    session.stop()
+    _last_report = session.report()
+    _last_folded = session.sampler.folded()
+    logger.info("Profiling window closed: %i samples, %i requests", session.sampler.samples, len(session.timelines))
+    return _last_report
+
+
+def is_profiling() -> bool:
+    return _session is not None
+
+
+def request_timeline(request_id: str) -> Optional[RequestTimeline]:
+    """Starts the timeline of a request when a profiling window is open, else returns None."""
+    session = _session
+    if session is None:
+        return None
+    if len(session.timelines) >= PROFILE_MAX_REQUESTS:
+        session.dropped_requests += 1
+        return None
+    timeline = session.timelines[request_id] = RequestTimeline(request_id)
+    return timeline
+
+
+def get_timeline(request_id: Optional[str]) -> Optional[RequestTimeline]:
+    """Returns the timeline of a request being profiled, else None."""
+    session = _session
+    if session is None or request_id is None:
+        return None
+    return session.timelines.get(request_id)
+
+
+def get_profiling_status() -> dict:
+    session = _session
+    status = {"active": session is not None, "last_report_available": _last_report is not None}
+    if session is not None:
+        elapsed = time.perf_counter() - session.started
+        status.update({
+            "started_at": session.started_at.isoformat(),
+            "elapsed_secs": round(elapsed, 3),
+            "remaining_secs": round(max(0.0, session.duration - elapsed), 3),
+            "samples": session.sampler.samples,
+            "requests": len(session.timelines),
+        })
+    return status
+
+
+def get_last_report() -> Optional[dict]:
+    """Report of the last closed profiling window."""
+    return _last_report
+
+
+def get_last_folded_stacks() -> Optional[str]:
+    """Folded stacks of the last closed profiling window, for flamegraph tools."""
+    return _last_folded
@@ -0,0 +1,74 @@
+"""ADK plugin adding tool executions and model waits to the profiling timelines.
+
+Does nothing but a module global test unless a profiling window is open;
+see the `profiling` module.
+"""
+
+from typing import Any, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.plugins import BasePlugin
+from google.adk.tools import BaseTool
+from google.adk.tools.tool_context import ToolContext
+
+from . import profiling
+from .state import REQUEST_ID_STATE_KEY
+
+
+def _timeline(context: CallbackContext) -> Optional[profiling.RequestTimeline]:
+    if not profiling.is_profiling():
+        return None
+    return profiling.get_timeline(context.state.get(REQUEST_ID_STATE_KEY))
+
+
+class ProfilingPlugin(BasePlugin):
+    """Records a span per tool execution and per model call of the profiled requests."""
+
+    def __init__(self):
+        super().__init__(name="profiling")
+
+    async def before_model_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> None:
+        timeline = _timeline(callback_context)
+        if timeline is not None:
+            # The calls of an agent are sequential
+            timeline.begin(("model", callback_context.agent_name))
+
+    async def after_model_callback(
+        self, *, callback_context: CallbackContext, llm_response: LlmResponse
+    ) -> None:
+        timeline = _timeline(callback_context)
+        if timeline is not None and not llm_response.partial:
+            timeline.end(("model", callback_context.agent_name), profiling.MODEL_WAIT, callback_context.agent_name)
+
+    async def on_model_error_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest, error: Exception
+    ) -> Optional[LlmResponse]:
+        timeline = _timeline(callback_context)
+        if timeline is not None:
+            timeline.end(("model", callback_context.agent_name), profiling.MODEL_WAIT, callback_context.agent_name)
+        return None
+
+    async def before_tool_callback(
+        self, *, tool: BaseTool, tool_args: dict[str, Any], tool_context: ToolContext
+    ) -> None:
+        timeline = _timeline(tool_context)
+        if timeline is not None:
+            timeline.begin(("tool", tool_context.function_call_id))
+
+    async def after_tool_callback(
+        self, *, tool: BaseTool, tool_args: dict[str, Any], tool_context: ToolContext, result: dict
+    ) -> None:
+        timeline = _timeline(tool_context)
+        if timeline is not None:
+            timeline.end(("tool", tool_context.function_call_id), profiling.TOOL_EXECUTION, tool.name)
+
+    async def on_tool_error_callback(
+        self, *, tool: BaseTool, tool_args: dict[str, Any], tool_context: ToolContext, error: Exception
+    ) -> Optional[dict]:
+        timeline = _timeline(tool_context)
+        if timeline is not None:
+            timeline.end(("tool", tool_context.function_call_id), profiling.TOOL_EXECUTION, tool.name)
+        return None
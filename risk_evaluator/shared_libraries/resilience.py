@@ -0,0 +1,240 @@
+"""Resilience layer around the LiteLLM model calls.
+
+Model calls are retried in place, inside the agent that issued them, so a
+transient provider error does not throw away the evaluations its sibling
+agents already completed. Retries are:
+
+- classified: only rate limits, timeouts, overload and 5xx errors are retried
+- spaced with exponential backoff and full jitter
+- capped by a per-model retry budget, so retries cannot multiply the load on
+  a provider that is already failing
+- short-circuited by a per-model circuit breaker while the provider is down
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 4
+BASE_DELAY_SECS = 0.5
+MAX_DELAY_SECS = 20.0
+
+# Every model call earns RETRY_BUDGET_RATIO retries, on top of a reserve of
+# RETRY_BUDGET_MIN retries
+RETRY_BUDGET_RATIO = 0.2
+RETRY_BUDGET_MIN = 10
+
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_SECS = 30.0
+
+RATE_LIMITED = "rate_limited"
+TRANSIENT = "transient"
+FATAL = "fatal"
+
+_TRANSIENT_STATUS_CODES = {408, 409, 500, 502, 503, 504, 529}
+
+
+class CircuitOpenError(Exception):
+    """Raised when a model call is refused because its circuit is open."""
+
+    def __init__(self, model: str, retry_in: float):
+        super().__init__(f"Circuit open for model '{model}', retry in {retry_in:.0f}s")
+        self.model = model
+        self.retry_in = retry_in
+
+
+def classify_error(error: BaseException) -> str:
+    """Classifies a model-call error as RATE_LIMITED, TRANSIENT or FATAL."""
+    status_code = getattr(error, "status_code", None)
+    if status_code == 429 or "RateLimit" in type(error).__name__:
+        return RATE_LIMITED
+    if status_code in _TRANSIENT_STATUS_CODES:
+        return TRANSIENT
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return TRANSIENT
+    if status_code is None and any(
+        name in type(error).__name__ for name in ("Timeout", "Connection", "ServiceUnavailable")
+    ):
+        return TRANSIENT
+    return FATAL
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, error: Optional[BaseException] = None) -> float:
+    """Full-jitter exponential backoff, honouring a provider Retry-After."""
+    delay = random.uniform(0, min(MAX_DELAY_SECS, BASE_DELAY_SECS * 2 ** attempt))
+    if error is not None:
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, min(MAX_DELAY_SECS, retry_after))
+    return delay
+
+
+class RetryBudget:
+    """Token bucket limiting retries to a fraction of the model calls."""
+
+    def __init__(self, ratio: float = RETRY_BUDGET_RATIO, reserve: int = RETRY_BUDGET_MIN):
+        self.ratio = ratio
+        self.reserve = reserve
+        self._tokens = float(reserve)
+        self.exhausted = 0
+
+    def record_call(self) -> None:
+        self._tokens = min(float(self.reserve), self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        self.exhausted += 1
+        return False
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        model: str,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = BREAKER_RESET_SECS,
+    ):
+        self.model = model
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    def before_call(self) -> None:
+        """Raises CircuitOpenError unless a call may go through."""
+        if self.state == self.OPEN:
+            elapsed = time.monotonic() - self._opened_at
+            if elapsed < self.reset_timeout:
+                raise CircuitOpenError(self.model, self.reset_timeout - elapsed)
+            self.state = self.HALF_OPEN
+            self._probing = False
+        if self.state == self.HALF_OPEN:
+            if self._probing:
+                raise CircuitOpenError(self.model, self.reset_timeout)
+            self._probing = True
+
+    def record_success(self) -> None:
+        if self.state != self.CLOSED:
+            logger.info("circuit for %s closed", self.model)
+        self.state = self.CLOSED
+        self._failures = 0
+        self._probing = False
+
+    def release_probe(self) -> None:
+        """Ends a call that says nothing about the provider's health, keeping the state."""
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning("circuit for %s opened after %i failures", self.model, self._failures)
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+            self._probing = False
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_budgets: Dict[str, RetryBudget] = {}
+_rate_limit_listeners: List[Callable[[], None]] = []
+
+
+def add_rate_limit_listener(listener: Callable[[], None]) -> None:
+    """Registers a function called on every rate-limited (429) model call."""
+    _rate_limit_listeners.append(listener)
+
+
+def get_breaker(model: str) -> CircuitBreaker:
+    if model not in _breakers:
+        _breakers[model] = CircuitBreaker(model)
+    return _breakers[model]
+
+
+def get_retry_budget(model: str) -> RetryBudget:
+    if model not in _budgets:
+        _budgets[model] = RetryBudget()
+    return _budgets[model]
+
+
+def get_resilience_stats() -> dict:
+    """Returns the circuit state and retry budget of every model."""
+    return {
+        model: {
+            "circuit": breaker.state,
+            "retry_budget_exhausted": get_retry_budget(model).exhausted,
+        }
+        for model, breaker in _breakers.items()
+    }
+
+
+async def call_with_retries(model: str, call: Callable[[], Awaitable[Any]]) -> Any:
+    """Runs a model call with classified retries, retry budget and circuit breaker.
+
+    Args:
+        model: The model name, selecting the circuit breaker and retry budget.
+        call: Zero-argument coroutine factory issuing the model call.
+
+    Raises:
+        CircuitOpenError: If the model's circuit is open.
+    """
+    breaker = get_breaker(model)
+    budget = get_retry_budget(model)
+    budget.record_call()
+
+    attempt = 0
+    while True:
+        breaker.before_call()
+        # Only the half-open probe holds the breaker's single probe slot
+        probe = breaker.state == CircuitBreaker.HALF_OPEN
+        try:
+            response = await call()
+        except Exception as e:
+            kind = classify_error(e)
+            if kind == RATE_LIMITED:
+                for listener in _rate_limit_listeners:
+                    listener()
+            if kind == FATAL:
+                # The request itself is wrong: this proves neither that the
+                # provider is down nor that it recovered
+                if probe:
+                    breaker.release_probe()
+                raise
+            breaker.record_failure()
+            attempt += 1
+            if attempt >= MAX_ATTEMPTS or not budget.try_spend():
+                logger.warning("%s call failed after %i attempt(s): %s", model, attempt, e)
+                raise
+            delay = backoff_delay(attempt, e)
+            logger.info("%s call failed (%s), retrying in %.2fs: %s", model, kind, delay, e)
+            await asyncio.sleep(delay)
+            continue
+        except BaseException:
+            # Cancelled (client gone, timeout, coalesced flight dropped): the
+            # call ended without an answer, so the next one must be able to probe
+            if probe:
+                breaker.release_probe()
+            raise
+        breaker.record_success()
+        return response
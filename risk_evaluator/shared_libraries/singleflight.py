@@ -0,0 +1,147 @@
+"""Request coalescing (single-flight) helpers.
+
+Concurrent callers asking for the same piece of work share a single
+in-progress execution instead of starting their own agent run.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """A shared in-flight execution and the number of callers awaiting it."""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Deduplicates concurrent executions that share the same key.
+
+    The first caller for a key starts the work in a background task; every
+    caller (including the first) awaits that task through `asyncio.shield`, so
+    one caller disconnecting does not cancel the work for the others. The
+    shared task is cancelled only when the last waiting caller goes away, and
+    forgotten at once, so later callers for the key start over.
+    """
+
+    def __init__(self, name: str = "singleflight"):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self.shared_count = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Runs `fn` for `key`, or joins the execution already running for it.
+
+        Args:
+            key: Identity of the work; callers with equal keys share one run.
+            fn: Zero-argument coroutine factory performing the work.
+
+        Returns:
+            The result of the shared execution. Exceptions raised by the
+            execution are propagated to every caller.
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _task: self._forget(key, call))
+        else:
+            self.shared_count += 1
+            logger.info("%s: joining in-flight execution (%i waiters)", self.name, call.waiters + 1)
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                logger.info("%s: last caller left, cancelling in-flight execution", self.name)
+                # The task may take a while to unwind: a caller arriving
+                # meanwhile must start a fresh execution, not join a dying one
+                self._forget(key, call)
+                call.task.cancel()
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+
+class LeaderGone(Exception):
+    """Raised to followers when the leading execution ended without a result."""
+
+
+class InFlightRegistry:
+    """Leader/follower registry for work that runs inside someone else's task.
+
+    Unlike `SingleFlight`, the work is not started by the registry: the first
+    caller to `claim` a key becomes its leader and must later `resolve` it,
+    while later callers receive a future to await. When the leader's owner
+    finishes without resolving (error, cancellation), `release_owner` fails
+    the pending futures with `LeaderGone` so followers can run the work
+    themselves.
+    """
+
+    def __init__(self):
+        self._leaders: Dict[Hashable, Tuple[str, asyncio.Future]] = {}
+        self.shared_count = 0
+
+    def claim(self, key: Hashable, owner: str) -> Optional[asyncio.Future]:
+        """Claims leadership for `key`.
+
+        Returns:
+            None if `owner` is now the leader, otherwise the leader's future.
+        """
+        entry = self._leaders.get(key)
+        if entry is not None and not entry[1].done():
+            if entry[0] == owner:
+                return None
+            self.shared_count += 1
+            return entry[1]
+        self._leaders[key] = (owner, asyncio.get_running_loop().create_future())
+        return None
+
+    def resolve(self, key: Hashable, owner: str, value: Any) -> None:
+        """Publishes the leader's result to every follower of `key`."""
+        entry = self._leaders.get(key)
+        if entry is None or entry[0] != owner:
+            return
+        del self._leaders[key]
+        if not entry[1].done():
+            entry[1].set_result(value)
+
+    def abandon(self, key: Hashable, owner: str) -> None:
+        """Gives up leadership of `key`, failing its followers."""
+        entry = self._leaders.get(key)
+        if entry is None or entry[0] != owner:
+            return
+        del self._leaders[key]
+        if not entry[1].done():
+            entry[1].set_exception(LeaderGone(f"leader '{owner}' ended without a result"))
+            # Mark the exception as retrieved when nobody is following.
+            entry[1].exception()
+
+    def release_owner(self, owner: str) -> None:
+        """Fails every key still led by `owner`."""
+        for key, (leader, _future) in list(self._leaders.items()):
+            if leader == owner:
+                self.abandon(key, owner)
+
+    async def wait(self, future: asyncio.Future) -> Optional[Any]:
+        """Awaits a leader's future without cancelling it on caller exit.
+
+        Returns:
+            The leader's result, or None if the leader went away.
+        """
+        try:
+            return await asyncio.shield(future)
+        except LeaderGone:
+            return None
@@ -0,0 +1,22 @@
+"""Session state keys and registries shared by the API and the agent callbacks.
+
+This module is imported by the API at startup, so it must stay free of
+heavy dependencies (google.adk, litellm).
+"""
+
+from .singleflight import InFlightRegistry
+
+# Session state keys written by the API when a structured request is submitted.
+POLICY_REQUEST_STATE_KEY = "policy_request"
+REQUEST_ID_STATE_KEY = "request_id"
+
+# Set to True by `repair_structured_output_callback` for agents whose output
+# could not be recovered, so the API can re-ask just that agent.
+PARSE_FAILED_STATE_PREFIX = "parse_failed:"
+
+# Set to True by `degrade_on_model_error_callback` for agents whose model
+# calls failed after all retries.
+DEGRADED_STATE_PREFIX = "degraded:"
+
+# Process-wide registry of in-flight per-dimension evaluations.
+dimension_registry = InFlightRegistry()
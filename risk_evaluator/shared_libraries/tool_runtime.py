@@ -0,0 +1,206 @@
+"""Async execution, timeouts and latency instrumentation for the agent tools.
+
+ADK awaits async tools but calls synchronous ones inline, on the event loop
+shared by every concurrent evaluation: a slow tariff database or judicial
+registry call would stall all of them. The `instrumented_tool` decorator
+turns a tool into a coroutine function:
+
+- synchronous (legacy) backends run in a bounded thread pool,
+  RISKEVAL_TOOL_THREADS workers (default 16)
+- every call is bounded by the tool's timeout (RISKEVAL_TOOL_TIMEOUT_SECS by
+  default, RISKEVAL_TOOL_TIMEOUT_<TOOL NAME>_SECS per tool) and answers an
+  error dict when it expires, so the agent can report the dimension as not
+  available instead of hanging
+- calls, errors, timeouts and latency percentiles are recorded per tool and
+  reported by `get_tool_stats`
+
+A thread cannot be interrupted: a timed-out synchronous call keeps its
+worker until the backend returns, so backends should enforce their own
+timeouts too.
+"""
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+TOOL_THREADS = int(os.getenv("RISKEVAL_TOOL_THREADS", "16"))
+DEFAULT_TIMEOUT_SECS = float(os.getenv("RISKEVAL_TOOL_TIMEOUT_SECS", "10"))
+
+# Latency samples kept per tool for the percentiles
+LATENCY_WINDOW = 1024
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+# Calls waiting for a worker and calls running in one, updated from both the
+# event loop and the workers
+_pool_lock = threading.Lock()
+_queued = 0
+_running = 0
+
+
+def get_tool_executor() -> ThreadPoolExecutor:
+    """Returns the thread pool running the synchronous tool backends."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=TOOL_THREADS, thread_name_prefix="riskeval-tool")
+    return _executor
+
+
+def shutdown_tool_executor() -> None:
+    """Stops the tool thread pool, without waiting for running backends."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+class _PoolCall:
+    """A call submitted to the tool thread pool, counted while queued and running."""
+
+    def __init__(self, fn: Callable[[], Any]):
+        self.fn = fn
+        self.started = False
+        self.abandoned = False
+
+    def run(self) -> Any:
+        global _queued, _running
+        with _pool_lock:
+            if self.abandoned:
+                # The caller went away while the call was queued
+                return None
+            self.started = True
+            _queued -= 1
+            _running += 1
+        try:
+            return self.fn()
+        finally:
+            with _pool_lock:
+                _running -= 1
+
+    def abandon(self) -> None:
+        global _queued
+        with _pool_lock:
+            if not self.started and not self.abandoned:
+                self.abandoned = True
+                _queued -= 1
+
+
+async def run_blocking(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Runs a blocking function in the tool thread pool, keeping the caller's context variables."""
+    global _queued
+    context = contextvars.copy_context()
+    call = _PoolCall(functools.partial(context.run, fn, *args, **kwargs))
+    with _pool_lock:
+        _queued += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(get_tool_executor(), call.run)
+    finally:
+        call.abandon()
+
+
+class ToolStats:
+    """Call counters and recent latencies of a tool."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def record(self, latency: float, error: bool = False, timeout: bool = False) -> None:
+        self.calls += 1
+        self.errors += error
+        self.timeouts += timeout
+        self.latencies.append(latency)
+
+    def to_dict(self) -> dict:
+        latencies = sorted(self.latencies)
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 3)
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "max_ms": round(latencies[-1] * 1000, 3) if latencies else None,
+        }
+
+
+_tool_stats: Dict[str, ToolStats] = {}
+
+
+def tool_timeout(name: str, default: Optional[float] = None) -> float:
+    """Returns the timeout of a tool, honouring RISKEVAL_TOOL_TIMEOUT_<NAME>_SECS."""
+    value = os.getenv(f"RISKEVAL_TOOL_TIMEOUT_{name.upper()}_SECS")
+    if value is not None:
+        return float(value)
+    return default if default is not None else DEFAULT_TIMEOUT_SECS
+
+
+def instrumented_tool(timeout: Optional[float] = None):
+    """Makes a tool async, with a timeout and latency instrumentation.
+
+    Synchronous functions are run in the tool thread pool; coroutine
+    functions are awaited on the event loop. The wrapper keeps the name,
+    signature and docstring ADK builds the tool declaration from.
+
+    Args:
+        timeout: Timeout in seconds, defaults to RISKEVAL_TOOL_TIMEOUT_SECS;
+            RISKEVAL_TOOL_TIMEOUT_<TOOL NAME>_SECS overrides both.
+    """
+
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        name = fn.__name__
+        limit = tool_timeout(name, timeout)
+        stats = _tool_stats.setdefault(name, ToolStats())
+        is_async = inspect.iscoroutinefunction(fn)
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            call = fn(*args, **kwargs) if is_async else run_blocking(fn, *args, **kwargs)
+            try:
+                result = await asyncio.wait_for(call, limit)
+            except asyncio.TimeoutError:
+                stats.record(time.perf_counter() - start, error=True, timeout=True)
+                logger.warning("tool %s timed out after %.1fs", name, limit)
+                return {"status": "error", "error_message": f"The {name} lookup timed out, please retry later."}
+            except Exception:
+                stats.record(time.perf_counter() - start, error=True)
+                raise
+            stats.record(
+                time.perf_counter() - start,
+                error=isinstance(result, dict) and result.get("status") == "error"
+            )
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def get_tool_stats() -> dict:
+    """Returns the per-tool statistics and the state of the thread pool."""
+    return {
+        "thread_pool": {
+            "max_workers": TOOL_THREADS,
+            "running": _running,
+            "queued": _queued,
+        },
+        "tools": {name: stats.to_dict() for name, stats in _tool_stats.items()},
+    }
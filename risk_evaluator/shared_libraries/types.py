@@ -1,5 +1,6 @@
 
 from enum import Enum
+from typing import Dict, Optional
 from pydantic import BaseModel, Field
 
 class RiskScore(str, Enum):
@@ -9,6 +10,12 @@ class RiskScore(str, Enum):
     VERY_HIGH = "VERY_HIGH"
     NOT_AVAILABLE = "NOT_AVAILABLE"
 
+class UsageType(str, Enum):
+    PRIVATE = "PRIVATE"
+    COMMUTING = "COMMUTING"
+    BUSINESS = "BUSINESS"
+    RIDE_SHARING = "RIDE_SHARING"
+
 class RiskEvaluation(BaseModel):
     score: RiskScore
     evaluation: str
@@ -18,4 +25,24 @@ class PolicyRequest(BaseModel):
     city: str = Field(..., description="City where the policy holder lives (e.g., 'Milano', 'Roma', 'Napoli')")
     tariff_id: str = Field(..., description="Tariff identifier for the insurance policy (e.g., 'TARIFF_001')")
     vehicle_brand: str = Field(..., description="Brand of the insured vehicle (e.g., 'Ferrari', 'BMW', 'Volkswagen')")
-    fiscal_code: str = Field(..., description="Italian fiscal code (Codice Fiscale) of the policy holder - 16 characters (e.g., 'RSSMRA80A01H501U')")    
\ No newline at end of file
+    fiscal_code: str = Field(..., description="Italian fiscal code (Codice Fiscale) of the policy holder - 16 characters (e.g., 'RSSMRA80A01H501U')")
+    vehicle_power_kw: Optional[int] = Field(None, gt=0, description="Engine power of the insured vehicle in kW (e.g., 110)")
+    yearly_mileage_km: Optional[int] = Field(None, ge=0, description="Expected yearly mileage of the insured vehicle in km (e.g., 15000)")
+    usage_type: Optional[UsageType] = Field(None, description="How the vehicle is used: PRIVATE, COMMUTING, BUSINESS or RIDE_SHARING")
+
+class AgentUsage(BaseModel):
+    """Model, tool and time usage of one agent in an evaluation"""
+    model_calls: int = 0
+    model_errors: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_tokens: int = 0
+    estimated_cost_usd: float = 0.0
+    tool_calls: int = 0
+    tool_errors: int = 0
+    wall_time_secs: float = 0.0
+
+class EvaluationUsage(BaseModel):
+    """Per-agent usage of an evaluation and its totals"""
+    agents: Dict[str, AgentUsage] = Field(default_factory=dict)
+    total: AgentUsage = Field(default_factory=AgentUsage, description="Sums over the agents; wall time of the whole evaluation")
@@ -0,0 +1,236 @@
+"""Per-request token, cost and latency accounting.
+
+The usage plugin (`usage_plugin.UsagePlugin`) reports, through the ADK
+callbacks, every agent run, model call and tool call of an evaluation to
+the `UsageCollector`, keyed by the request id stored in the session state.
+For each agent it accounts
+
+- model calls and model errors
+- input, output and cached input tokens, from the model usage metadata
+- the estimated cost of the calls, from MODEL_PRICES_PER_MTOK (falling back
+  to the LiteLLM cost map for the models missing from it)
+- tool calls and tool errors
+- wall time, from the agent start to its end (or its last event, for the
+  agents answered with the result of a coalesced evaluation)
+
+`finish` returns the usage of an evaluation and adds it to a rolling window
+of the last RISKEVAL_USAGE_WINDOW evaluations (default 1000), summarized by
+`get_usage_summary` to tell which agents cost and take the most.
+
+This module is imported by the API at startup, so it must stay free of
+heavy dependencies (google.adk, litellm).
+"""
+
+import logging
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from .types import AgentUsage, EvaluationUsage
+
+logger = logging.getLogger(__name__)
+
+USAGE_WINDOW = int(os.getenv("RISKEVAL_USAGE_WINDOW", "1000"))
+
+# USD per million (input, output, cached input) tokens
+MODEL_PRICES_PER_MTOK: Dict[str, Tuple[float, float, float]] = {
+    "anthropic/claude-sonnet-4-20250514": (3.00, 15.00, 0.30),
+}
+
+_unpriced_models = set()
+
+
+def estimate_cost(model: Optional[str], input_tokens: int, output_tokens: int, cached_tokens: int = 0) -> float:
+    """Estimates the cost in USD of a model call; 0 for unknown models.
+
+    `input_tokens` includes the cached ones, billed at the cached input price.
+    """
+    if not model:
+        return 0.0
+    prices = MODEL_PRICES_PER_MTOK.get(model)
+    if prices is not None:
+        input_price, output_price, cached_price = prices
+        return (
+            (input_tokens - cached_tokens) * input_price
+            + cached_tokens * cached_price
+            + output_tokens * output_price
+        ) / 1_000_000
+    try:
+        import litellm
+
+        input_cost, output_cost = litellm.cost_per_token(
+            model=model,
+            prompt_tokens=input_tokens,
+            completion_tokens=output_tokens,
+            cache_read_input_tokens=cached_tokens,
+        )
+        return input_cost + output_cost
+    except Exception:
+        if model not in _unpriced_models:
+            _unpriced_models.add(model)
+            logger.warning("No price known for model %s, its cost is not estimated", model)
+        return 0.0
+
+
+class _AgentRecord:
+    """Usage counters of an agent in a running evaluation."""
+
+    def __init__(self):
+        self.usage = AgentUsage()
+        self.model: Optional[str] = None
+        self.started: Optional[float] = None
+        self.ended: Optional[float] = None
+
+    def touch(self, now: float) -> None:
+        if self.started is None:
+            self.started = now
+        self.ended = now
+
+
+class _RequestRecord:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.agents: Dict[str, _AgentRecord] = {}
+
+    def agent(self, name: str) -> _AgentRecord:
+        record = self.agents.get(name)
+        if record is None:
+            record = self.agents[name] = _AgentRecord()
+        return record
+
+
+class UsageCollector:
+    """Collects the usage of the running evaluations and keeps a window of the finished ones.
+
+    Events of requests that were not started (or already finished) are
+    ignored, so the plugin costs nothing to runs outside the API.
+    """
+
+    def __init__(self, window: int = USAGE_WINDOW):
+        self._requests: Dict[str, _RequestRecord] = {}
+        self._window: Deque[EvaluationUsage] = deque(maxlen=window)
+        self.evaluations = 0
+
+    def start(self, request_id: str) -> None:
+        self._requests[request_id] = _RequestRecord()
+
+    def _agent(self, request_id: Optional[str], agent_name: str) -> Optional[_AgentRecord]:
+        request = self._requests.get(request_id) if request_id else None
+        return request.agent(agent_name) if request is not None else None
+
+    def agent_started(self, request_id: Optional[str], agent_name: str) -> None:
+        record = self._agent(request_id, agent_name)
+        if record is not None and record.started is None:
+            record.started = time.monotonic()
+
+    def agent_active(self, request_id: Optional[str], agent_name: str) -> None:
+        """Records an agent end or event; the last one sets the end of the agent."""
+        record = self._agent(request_id, agent_name)
+        if record is not None:
+            record.touch(time.monotonic())
+
+    def model_called(self, request_id: Optional[str], agent_name: str, model: Optional[str]) -> None:
+        record = self._agent(request_id, agent_name)
+        if record is not None:
+            record.usage.model_calls += 1
+            record.model = model or record.model
+
+    def model_responded(
+        self,
+        request_id: Optional[str],
+        agent_name: str,
+        input_tokens: int,
+        output_tokens: int,
+        cached_tokens: int,
+    ) -> None:
+        record = self._agent(request_id, agent_name)
+        if record is None:
+            return
+        usage = record.usage
+        usage.input_tokens += input_tokens
+        usage.output_tokens += output_tokens
+        usage.cached_tokens += cached_tokens
+        usage.estimated_cost_usd += estimate_cost(record.model, input_tokens, output_tokens, cached_tokens)
+
+    def model_failed(self, request_id: Optional[str], agent_name: str) -> None:
+        record = self._agent(request_id, agent_name)
+        if record is not None:
+            record.usage.model_errors += 1
+
+    def tool_called(self, request_id: Optional[str], agent_name: str, error: bool = False) -> None:
+        record = self._agent(request_id, agent_name)
+        if record is not None:
+            record.usage.tool_calls += 1
+            record.usage.tool_errors += error
+
+    def finish(self, request_id: str) -> Optional[EvaluationUsage]:
+        """Returns the usage of an evaluation and adds it to the rolling window."""
+        request = self._requests.pop(request_id, None)
+        if request is None:
+            return None
+        total = AgentUsage(wall_time_secs=round(time.monotonic() - request.started, 3))
+        agents = {}
+        for name, record in request.agents.items():
+            usage = record.usage
+            if record.started is not None and record.ended is not None:
+                usage.wall_time_secs = round(record.ended - record.started, 3)
+            usage.estimated_cost_usd = round(usage.estimated_cost_usd, 6)
+            for field in ("model_calls", "model_errors", "input_tokens", "output_tokens",
+                          "cached_tokens", "estimated_cost_usd", "tool_calls", "tool_errors"):
+                setattr(total, field, getattr(total, field) + getattr(usage, field))
+            agents[name] = usage
+        total.estimated_cost_usd = round(total.estimated_cost_usd, 6)
+        result = EvaluationUsage(agents=agents, total=total)
+        self._window.append(result)
+        self.evaluations += 1
+        return result
+
+    def discard(self, request_id: str) -> None:
+        """Drops a request without recording it, e.g. when its evaluation failed."""
+        self._requests.pop(request_id, None)
+
+    def summary(self) -> dict:
+        """Averages of the evaluations in the window, per agent and in total."""
+        window = list(self._window)
+
+        def averages(usages) -> dict:
+            count = len(usages)
+            wall_times = sorted(usage.wall_time_secs for usage in usages)
+            return {
+                "evaluations": count,
+                "avg_model_calls": round(sum(u.model_calls for u in usages) / count, 3),
+                "avg_input_tokens": round(sum(u.input_tokens for u in usages) / count, 1),
+                "avg_output_tokens": round(sum(u.output_tokens for u in usages) / count, 1),
+                "avg_cached_tokens": round(sum(u.cached_tokens for u in usages) / count, 1),
+                "avg_tool_calls": round(sum(u.tool_calls for u in usages) / count, 3),
+                "avg_cost_usd": round(sum(u.estimated_cost_usd for u in usages) / count, 6),
+                "total_cost_usd": round(sum(u.estimated_cost_usd for u in usages), 6),
+                "avg_wall_time_secs": round(sum(wall_times) / count, 3),
+                "p95_wall_time_secs": wall_times[min(count - 1, int(count * 0.95))],
+            }
+
+        summary = {
+            "evaluations": self.evaluations,
+            "in_progress": len(self._requests),
+            "window": len(window),
+            "total": averages([usage.total for usage in window]) if window else None,
+            "agents": {},
+        }
+        if window:
+            total_cost = sum(usage.total.estimated_cost_usd for usage in window)
+            names = sorted({name for usage in window for name in usage.agents})
+            for name in names:
+                agent = averages([usage.agents[name] for usage in window if name in usage.agents])
+                agent["cost_share"] = round(agent["total_cost_usd"] / total_cost, 3) if total_cost else None
+                summary["agents"][name] = agent
+        return summary
+
+
+# Process-wide collector, fed by the usage plugin
+usage_collector = UsageCollector()
+
+
+def get_usage_summary() -> dict:
+    """Returns the rolling usage summary of the recent evaluations."""
+    return usage_collector.summary()
@@ -0,0 +1,95 @@
+"""ADK plugin feeding the per-request usage accounting.
+
+Registered on the API runners, it reports the agent, model and tool
+callbacks of every evaluation to `usage.usage_collector`; see the `usage`
+module for what is accounted.
+"""
+
+from typing import Any, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.plugins import BasePlugin
+from google.adk.tools import BaseTool
+from google.adk.tools.tool_context import ToolContext
+
+from .state import REQUEST_ID_STATE_KEY
+from .usage import UsageCollector, usage_collector
+
+
+class UsagePlugin(BasePlugin):
+    """Accounts model calls, tokens, cost, tool calls and wall time per agent.
+
+    The plugin only observes: every callback returns None, leaving the
+    agent callbacks and the run unchanged.
+    """
+
+    def __init__(self, collector: UsageCollector = usage_collector):
+        super().__init__(name="usage")
+        self.collector = collector
+
+    async def before_agent_callback(
+        self, *, agent: BaseAgent, callback_context: CallbackContext
+    ) -> None:
+        self.collector.agent_started(callback_context.state.get(REQUEST_ID_STATE_KEY), agent.name)
+
+    async def after_agent_callback(
+        self, *, agent: BaseAgent, callback_context: CallbackContext
+    ) -> None:
+        self.collector.agent_active(callback_context.state.get(REQUEST_ID_STATE_KEY), agent.name)
+
+    async def on_event_callback(
+        self, *, invocation_context: InvocationContext, event: Event
+    ) -> None:
+        # after_agent_callback is skipped for the agents answered by their
+        # before_agent_callback (coalesced evaluations): their last event ends them
+        if event.author and event.author != "user":
+            self.collector.agent_active(
+                invocation_context.session.state.get(REQUEST_ID_STATE_KEY), event.author
+            )
+
+    async def before_model_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> None:
+        self.collector.model_called(
+            callback_context.state.get(REQUEST_ID_STATE_KEY), callback_context.agent_name, llm_request.model
+        )
+
+    async def after_model_callback(
+        self, *, callback_context: CallbackContext, llm_response: LlmResponse
+    ) -> None:
+        usage = llm_response.usage_metadata
+        # Streamed partial responses carry no (or cumulative) usage
+        if llm_response.partial or usage is None:
+            return
+        self.collector.model_responded(
+            callback_context.state.get(REQUEST_ID_STATE_KEY),
+            callback_context.agent_name,
+            input_tokens=usage.prompt_token_count or 0,
+            output_tokens=usage.candidates_token_count or 0,
+            cached_tokens=usage.cached_content_token_count or 0,
+        )
+
+    async def on_model_error_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest, error: Exception
+    ) -> Optional[LlmResponse]:
+        self.collector.model_failed(callback_context.state.get(REQUEST_ID_STATE_KEY), callback_context.agent_name)
+        return None
+
+    async def after_tool_callback(
+        self, *, tool: BaseTool, tool_args: dict[str, Any], tool_context: ToolContext, result: dict
+    ) -> None:
+        self.collector.tool_called(
+            tool_context.state.get(REQUEST_ID_STATE_KEY),
+            tool_context.agent_name,
+            error=isinstance(result, dict) and result.get("status") == "error",
+        )
+
+    async def on_tool_error_callback(
+        self, *, tool: BaseTool, tool_args: dict[str, Any], tool_context: ToolContext, error: Exception
+    ) -> Optional[dict]:
+        self.collector.tool_called(tool_context.state.get(REQUEST_ID_STATE_KEY), tool_context.agent_name, error=True)
+        return None
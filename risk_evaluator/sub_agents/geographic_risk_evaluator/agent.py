@@ -1,12 +1,21 @@
 from google.adk.agents import Agent
-from google.adk.models.lite_llm import LiteLlm
 from .tools import get_zone, get_risk_evaluation_by_zone
 from ...shared_libraries.types import RiskEvaluation
-from ...shared_libraries.callbacks import rate_limit_callback
+from ...shared_libraries.models import build_model
+from ...shared_libraries.callbacks import (
+    degrade_on_model_error_callback,
+    make_coalescing_callbacks,
+    rate_limit_callback,
+    repair_structured_output_callback,
+)
+
+before_agent_callback, after_agent_callback = make_coalescing_callbacks(
+    "geographic_risk", ("city", "tariff_id")
+)
 
 geographic_risk_evaluator = Agent(
     name="geographic_risk_evaluator",
-    model=LiteLlm(model='anthropic/claude-sonnet-4-20250514'),
+    model=build_model('anthropic/claude-sonnet-4-20250514'),
     description="Evaluates the risk of a buyer based on geographic data",
     instruction="""
     You are an expert insurance underwriter specializing in geographic risk assessment
@@ -65,5 +74,9 @@ geographic_risk_evaluator = Agent(
     tools=[get_zone, get_risk_evaluation_by_zone],
     output_key="geographic_risk",
     output_schema=RiskEvaluation,
-    before_model_callback=rate_limit_callback
+    before_model_callback=rate_limit_callback,
+    after_model_callback=repair_structured_output_callback,
+    on_model_error_callback=degrade_on_model_error_callback,
+    before_agent_callback=before_agent_callback,
+    after_agent_callback=after_agent_callback
 )
\ No newline at end of file
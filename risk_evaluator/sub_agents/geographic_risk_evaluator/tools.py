@@ -1,6 +1,9 @@
 from ...shared_libraries.types import RiskEvaluation
+from ...shared_libraries.tool_runtime import instrumented_tool
 
-# This should be a call that discriminates zone by tariff
+# This should be a call that discriminates zone by tariff. Like the other
+# tools it is a synchronous backend, run in the tool thread pool.
+@instrumented_tool(timeout=5.0)
 def get_zone(city: str, tariff_id: str) -> dict:
     """Retrieves the geographic zone of a given city
 
@@ -29,6 +32,7 @@ def get_zone(city: str, tariff_id: str) -> dict:
         return {"status": "success", "zone_id": "4"} 
 
 
+@instrumented_tool(timeout=5.0)
 def get_risk_evaluation_by_zone(zone_id: str) -> RiskEvaluation:
     """Retrieves the risk given a zone
 
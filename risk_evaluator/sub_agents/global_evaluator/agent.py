@@ -0,0 +1,50 @@
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from . import verdict_matrix
+from ...shared_libraries.parsing import RiskEvaluationParseError, parse_risk_evaluation
+from ...shared_libraries.types import RiskEvaluation, RiskScore
+
+# State keys of the sub-evaluations, in verdict matrix order
+INPUT_KEYS = ["geographic_risk", "vehicle_risk", "person_risk"]
+
+
+def read_evaluation(raw) -> RiskEvaluation:
+    """Reads a sub-evaluation from the session state, NOT_AVAILABLE when missing or invalid."""
+    if raw is None:
+        return RiskEvaluation(score=RiskScore.NOT_AVAILABLE, evaluation="No evaluation was produced.")
+    try:
+        return parse_risk_evaluation(raw)[0]
+    except RiskEvaluationParseError:
+        return RiskEvaluation(score=RiskScore.NOT_AVAILABLE, evaluation="The evaluation could not be read.")
+
+
+class TableGlobalEvaluator(BaseAgent):
+    """Global evaluator looking the final verdict up in the precomputed verdict matrix.
+
+    Produces the same `output_key` state entry as the LLM global evaluator,
+    without any model call.
+    """
+
+    output_key: str = "global_risk"
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        evaluations = [read_evaluation(ctx.session.state.get(key)) for key in INPUT_KEYS]
+        result = verdict_matrix.VERDICT_MATRIX.evaluate(*evaluations)
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role='model', parts=[types.Part(text=result.model_dump_json())]),
+            actions=EventActions(state_delta={self.output_key: result.model_dump(mode="json")}),
+        )
+
+
+global_evaluator = TableGlobalEvaluator(
+    name='global_evaluator',
+    description="Final evaluator combining all risk assessments through the precomputed verdict matrix",
+)
@@ -0,0 +1,297 @@
+"""Precomputed global verdict matrix.
+
+The global evaluation only depends on the three sub-scores, each one of the
+five RiskScore values, so its whole input space is 5 x 5 x 5 = 125
+combinations. The matrix stores, for every combination in row-major order
+
+    geographic score x vehicle score x person score
+
+the final score and a narrative template, so the global stage is a single
+list index plus the interpolation of the sub-evaluation texts into the
+template. Templates may use the placeholders {geographic_evaluation},
+{vehicle_evaluation} and {person_evaluation}.
+
+The matrix is a versioned artifact, `data/global_verdict_matrix.json` (or
+the file named by RISKEVAL_GLOBAL_VERDICT_MATRIX), built offline with:
+
+    python -m risk_evaluator.sub_agents.global_evaluator.verdict_matrix
+
+which writes the rule-based templates; add --no-templates to store the
+scores only, or --draft-templates MODEL to have a model draft the
+templates, to be reviewed before the file is shipped.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+from string import Formatter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from ...shared_libraries.types import RiskEvaluation, RiskScore
+
+logger = logging.getLogger(__name__)
+
+MATRIX_VERSION = 1
+
+SCORES = [score.value for score in RiskScore]
+DIMENSIONS = ["geographic", "vehicle", "person"]
+PLACEHOLDERS = {f"{dimension}_evaluation" for dimension in DIMENSIONS}
+
+DEFAULT_MATRIX_PATH = os.path.join(os.path.dirname(__file__), "data", "global_verdict_matrix.json")
+
+# Used for the combinations stored without a template
+GENERIC_TEMPLATE = (
+    "Geographic risk: {geographic_evaluation}\n"
+    "Vehicle risk: {vehicle_evaluation}\n"
+    "Person risk: {person_evaluation}"
+)
+
+_SCORE_INDEX = {score: i for i, score in enumerate(SCORES)}
+_RANK = {"LOW": 0, "MEDIUM": 1, "HIGH": 2, "VERY_HIGH": 3}
+_UNDERWRITING = {
+    "LOW": "The policy can be issued at the standard premium.",
+    "MEDIUM": "The policy can be issued with a moderately increased premium.",
+    "HIGH": "The policy should be issued only with a significantly increased premium.",
+    "VERY_HIGH": "The policy should not be issued without a manual underwriting review.",
+    "NOT_AVAILABLE": "No risk dimension could be evaluated: the application needs a manual review.",
+}
+
+
+def combine_scores(scores: Sequence[str]) -> Tuple[str, str]:
+    """Applies the global rules to the sub-scores, ignoring NOT_AVAILABLE ones.
+
+    Returns:
+        A (final score, rationale) tuple.
+    """
+    available = {dimension: score for dimension, score in zip(DIMENSIONS, scores) if score in _RANK}
+    if not available:
+        return "NOT_AVAILABLE", "None of the risk dimensions could be evaluated."
+
+    highest = max(available.values(), key=_RANK.get)
+    leaders = [dimension for dimension, score in available.items() if score == highest]
+    others = {dimension: score for dimension, score in available.items() if dimension not in leaders}
+    lead = _join(leaders)
+
+    if highest == "VERY_HIGH":
+        final = "VERY_HIGH"
+        rationale = f"The {lead} risk is VERY_HIGH, which alone makes the overall risk very high."
+    elif highest == "HIGH" and len(leaders) > 1:
+        final = "VERY_HIGH"
+        rationale = f"The {lead} risks are HIGH, which together raise the overall risk to very high."
+    elif highest == "HIGH" and "MEDIUM" in others.values():
+        final = "VERY_HIGH"
+        medium = [dimension for dimension, score in others.items() if score == "MEDIUM"]
+        rationale = (
+            f"The HIGH {lead} risk combined with the MEDIUM {_join(medium)} "
+            f"risk{'s' if len(medium) > 1 else ''} raises the overall risk to very high."
+        )
+    elif highest == "HIGH":
+        final = "HIGH"
+        rationale = f"The {lead} risk is HIGH while the other available dimensions are LOW."
+    elif highest == "MEDIUM" and len(leaders) > 1:
+        final = "HIGH"
+        rationale = f"The {lead} risks are MEDIUM, which together raise the overall risk to high."
+    elif highest == "MEDIUM":
+        final = "MEDIUM"
+        rationale = f"The {lead} risk is MEDIUM while the other available dimensions are LOW."
+    else:
+        final = "LOW"
+        rationale = "All the available risk dimensions are LOW."
+
+    missing = [dimension for dimension in DIMENSIONS if dimension not in available]
+    if missing:
+        rationale += (
+            f" The {_join(missing)} evaluation was not available, so the decision is based on the"
+            " remaining dimensions only."
+        )
+    return final, rationale
+
+
+def _join(dimensions) -> str:
+    dimensions = list(dimensions)
+    if len(dimensions) == 1:
+        return dimensions[0]
+    return ", ".join(dimensions[:-1]) + " and " + dimensions[-1]
+
+
+def rule_template(scores: Sequence[str]) -> str:
+    """Builds the narrative template of a combination from the global rules."""
+    final, rationale = combine_scores(scores)
+    lines = [f"Overall risk {final}. {rationale} {_UNDERWRITING[final]}"]
+    for dimension, score in zip(DIMENSIONS, scores):
+        lines.append(f"{dimension.capitalize()} risk ({score}): {{{dimension}_evaluation}}")
+    return "\n".join(lines)
+
+
+def _check_template(template: str) -> None:
+    fields = {name for _, name, _, _ in Formatter().parse(template) if name is not None}
+    if not fields <= PLACEHOLDERS:
+        raise ValueError(f"Unknown placeholders in template: {', '.join(sorted(fields - PLACEHOLDERS))}")
+
+
+def _combinations() -> List[Tuple[str, str, str]]:
+    return [(g, v, p) for g in SCORES for v in SCORES for p in SCORES]
+
+
+class VerdictMatrix:
+    """Final score and narrative template of every sub-score combination.
+
+    Args:
+        scores: Final score of each combination, in row-major order.
+        templates: Narrative template of each combination, None for the
+            combinations rendered with GENERIC_TEMPLATE.
+        revision: Content hash identifying the build of the matrix.
+    """
+
+    def __init__(self, scores: Sequence[str], templates: Sequence[Optional[str]], revision: str):
+        size = len(SCORES) ** len(DIMENSIONS)
+        if len(scores) != size or len(templates) != size:
+            raise ValueError(f"Verdict matrix must have {size} entries")
+        if any(score not in _SCORE_INDEX for score in scores):
+            raise ValueError("Verdict matrix scores must be RiskScore values")
+        for template in templates:
+            if template is not None:
+                _check_template(template)
+        self._scores = list(scores)
+        self._templates = [template if template is not None else GENERIC_TEMPLATE for template in templates]
+        self.revision = revision
+
+    def lookup(self, geographic: str, vehicle: str, person: str) -> Tuple[str, str]:
+        """Returns the (final score, template) of a combination of sub-scores."""
+        offset = (
+            (_SCORE_INDEX[geographic] * len(SCORES) + _SCORE_INDEX[vehicle]) * len(SCORES)
+            + _SCORE_INDEX[person]
+        )
+        return self._scores[offset], self._templates[offset]
+
+    def evaluate(
+        self,
+        geographic: RiskEvaluation,
+        vehicle: RiskEvaluation,
+        person: RiskEvaluation,
+    ) -> RiskEvaluation:
+        """Builds the global evaluation of three sub-evaluations."""
+        score, template = self.lookup(geographic.score.value, vehicle.score.value, person.score.value)
+        return RiskEvaluation(
+            score=score,
+            evaluation=template.format_map({
+                "geographic_evaluation": geographic.evaluation,
+                "vehicle_evaluation": vehicle.evaluation,
+                "person_evaluation": person.evaluation,
+            })
+        )
+
+    @classmethod
+    def from_file(cls, path: str) -> "VerdictMatrix":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if (data.get("version") != MATRIX_VERSION or data.get("scores") != SCORES
+                or data.get("dimensions") != DIMENSIONS):
+            raise ValueError(f"Unsupported verdict matrix format in {path}")
+        entries = data["entries"]
+        if [tuple(entry["key"]) for entry in entries] != _combinations():
+            raise ValueError(f"Verdict matrix entries in {path} are missing or out of order")
+        if _revision(entries) != data.get("revision"):
+            logger.warning("Verdict matrix %s was edited after its build (revision mismatch)", path)
+        return cls(
+            [entry["score"] for entry in entries],
+            [entry.get("template") for entry in entries],
+            data.get("revision", ""),
+        )
+
+
+def _revision(entries: List[dict]) -> str:
+    return hashlib.sha256(json.dumps(entries, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def build_entries(with_templates: bool = True) -> List[dict]:
+    """Computes the final score (and rule-based template) of every combination."""
+    entries = []
+    for key in _combinations():
+        entry = {"key": list(key), "score": combine_scores(key)[0]}
+        if with_templates:
+            entry["template"] = rule_template(key)
+        entries.append(entry)
+    return entries
+
+
+def draft_templates(entries: List[dict], model: str) -> None:
+    """Replaces the templates of `entries` with drafts written by `model`.
+
+    Drafts with unknown placeholders are discarded, keeping the rule-based
+    template. Every draft must be reviewed before the matrix is shipped.
+    """
+    import litellm
+
+    for entry in entries:
+        final, rationale = combine_scores(entry["key"])
+        response = litellm.completion(model=model, messages=[{"role": "user", "content": (
+            "Write the final evaluation of an insurance risk assessment, in a professional tone, "
+            f"for the sub-scores geographic={entry['key'][0]}, vehicle={entry['key'][1]}, "
+            f"person={entry['key'][2]} and the final score {final}. Decision rationale: {rationale}\n"
+            "Reference each dimension with the placeholders {geographic_evaluation}, "
+            "{vehicle_evaluation} and {person_evaluation}, which will be replaced by the "
+            "sub-evaluation texts. Reply with the template only."
+        )}])
+        template = response.choices[0].message.content.strip()
+        try:
+            _check_template(template)
+        except ValueError as e:
+            logger.warning("Discarding the draft for %s: %s", entry["key"], e)
+            continue
+        entry["template"] = template
+
+
+def build_matrix_file(path: str, with_templates: bool = True, draft_model: Optional[str] = None) -> Dict:
+    """Builds the matrix artifact and writes it to `path`."""
+    entries = build_entries(with_templates or draft_model is not None)
+    if draft_model:
+        draft_templates(entries, draft_model)
+    data = {
+        "version": MATRIX_VERSION,
+        "revision": _revision(entries),
+        "scores": SCORES,
+        "dimensions": DIMENSIONS,
+        "entries": entries,
+    }
+    # Keep the lists of scores (keys) on a single line
+    text = re.sub(
+        r'\[\s+((?:"[A-Z_a-z]+",?\s*)+?)\s+\]',
+        lambda m: "[" + ", ".join(m.group(1).replace(",", " ").split()) + "]",
+        json.dumps(data, indent=2)
+    )
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text + "\n")
+    return data
+
+
+def load_verdict_matrix(path: Optional[str] = None) -> VerdictMatrix:
+    """Loads (or reloads) the matrix used by the global evaluator.
+
+    Args:
+        path: The matrix file; defaults to RISKEVAL_GLOBAL_VERDICT_MATRIX,
+            then to the matrix shipped with the package.
+    """
+    global VERDICT_MATRIX
+    path = path or os.getenv("RISKEVAL_GLOBAL_VERDICT_MATRIX") or DEFAULT_MATRIX_PATH
+    VERDICT_MATRIX = VerdictMatrix.from_file(path)
+    logger.info("Loaded global verdict matrix %s from %s", VERDICT_MATRIX.revision, path)
+    return VERDICT_MATRIX
+
+
+VERDICT_MATRIX = load_verdict_matrix()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Builds the global verdict matrix artifact")
+    parser.add_argument("--output", default=DEFAULT_MATRIX_PATH, help="matrix file to write")
+    parser.add_argument("--no-templates", action="store_true", help="store the final scores only")
+    parser.add_argument("--draft-templates", metavar="MODEL", help="LiteLLM model drafting the templates")
+    args = parser.parse_args()
+
+    built = build_matrix_file(args.output, not args.no_templates, args.draft_templates)
+    print(f"Wrote {args.output} (revision {built['revision']})")
@@ -1,12 +1,21 @@
 from google.adk.agents import Agent
-from google.adk.models.lite_llm import LiteLlm
 from .tools import check_judicial_record, get_risk_evaluation_by_judicial_record, validate_fiscal_code
 from ...shared_libraries.types import RiskEvaluation
-from ...shared_libraries.callbacks import rate_limit_callback
+from ...shared_libraries.models import build_model
+from ...shared_libraries.callbacks import (
+    degrade_on_model_error_callback,
+    make_coalescing_callbacks,
+    rate_limit_callback,
+    repair_structured_output_callback,
+)
+
+before_agent_callback, after_agent_callback = make_coalescing_callbacks(
+    "person_risk", ("fiscal_code",)
+)
 
 person_risk_evaluator = Agent(
     name="person_risk_evaluator",
-    model=LiteLlm(model='anthropic/claude-sonnet-4-20250514'),
+    model=build_model('anthropic/claude-sonnet-4-20250514'),
     description="Evaluates the risk of a policy based on the policy holder's judicial record",
     instruction="""
     You are an expert in evaluating the risk of a policy emission based on the judicial
@@ -49,5 +58,9 @@ person_risk_evaluator = Agent(
     tools=[validate_fiscal_code, check_judicial_record, get_risk_evaluation_by_judicial_record],
     output_key="person_risk",
     output_schema=RiskEvaluation,
-    before_model_callback=rate_limit_callback
+    before_model_callback=rate_limit_callback,
+    after_model_callback=repair_structured_output_callback,
+    on_model_error_callback=degrade_on_model_error_callback,
+    before_agent_callback=before_agent_callback,
+    after_agent_callback=after_agent_callback
 )
@@ -1,6 +1,8 @@
 from ...shared_libraries.types import RiskEvaluation, RiskScore
+from ...shared_libraries.tool_runtime import instrumented_tool, run_blocking
 
 
+@instrumented_tool(timeout=10.0)
 def check_judicial_record(fiscal_code: str) -> dict:
     """Simulates a lookup in the Italian justice records (Casellario Giudiziale)
 
@@ -17,6 +19,10 @@ def check_judicial_record(fiscal_code: str) -> dict:
                 - 'severity': overall severity level
               If 'error', includes an 'error_message' key.
     """
+    return _judicial_record(fiscal_code)
+
+
+def _judicial_record(fiscal_code: str) -> dict:
     fiscal_code_normalized = fiscal_code.upper().replace(" ", "")
 
     # Validate basic format (16 characters for Italian fiscal code)
@@ -78,7 +84,8 @@ def check_judicial_record(fiscal_code: str) -> dict:
         }
 
 
-def get_risk_evaluation_by_judicial_record(fiscal_code: str) -> dict:
+@instrumented_tool(timeout=15.0)
+async def get_risk_evaluation_by_judicial_record(fiscal_code: str) -> dict:
     """Retrieves the complete risk evaluation based on judicial records
 
     Args:
@@ -90,7 +97,7 @@ def get_risk_evaluation_by_judicial_record(fiscal_code: str) -> dict:
               If 'success', includes 'risk_level' and 'evaluation' keys.
               If 'error', includes an 'error_message' key.
     """
-    record_result = check_judicial_record(fiscal_code)
+    record_result = await run_blocking(_judicial_record, fiscal_code)
 
     if record_result["status"] == "error":
         return record_result
@@ -1,41 +1,69 @@
 from google.adk.agents import Agent
-from google.adk.models.lite_llm import LiteLlm
 from .tools import get_brand_risk_category, get_risk_evaluation_by_brand
 from ...shared_libraries.types import RiskEvaluation
-from ...shared_libraries.callbacks import rate_limit_callback
+from ...shared_libraries.models import build_model
+from ...shared_libraries.callbacks import (
+    degrade_on_model_error_callback,
+    make_coalescing_callbacks,
+    rate_limit_callback,
+    repair_structured_output_callback,
+)
+
+before_agent_callback, after_agent_callback = make_coalescing_callbacks(
+    "vehicle_risk", ("vehicle_brand", "vehicle_power_kw", "yearly_mileage_km", "usage_type")
+)
 
 vehicle_risk_evaluator = Agent(
     name="vehicle_risk_evaluator",
-    model=LiteLlm(model='anthropic/claude-sonnet-4-20250514'),
-    description="Evaluates the risk of a policy based on the insured vehicle brand",
+    model=build_model('anthropic/claude-sonnet-4-20250514'),
+    description="Evaluates the risk of a policy based on the insured vehicle (brand, power, mileage, usage)",
     instruction="""
-    You are an expert in evaluating the risk of a policy emission based on the brand
-    of the insured vehicle.
+    You are an expert in evaluating the risk of a policy emission based on the insured
+    vehicle: its brand, engine power, yearly mileage and usage type.
 
     The brand of the vehicle determines the risk for the insurance company due to factors like:
     - Theft rates (luxury brands are more targeted)
     - Repair costs (premium brands have expensive parts)
     - Performance characteristics (sports cars have higher accident rates)
 
+    Higher engine power, higher yearly mileage and commercial usage (business,
+    ride sharing) increase the risk; low power and low mileage decrease it.
+
     You receive:
     - the brand of the vehicle
+    - when available, the engine power (kW), the yearly mileage (km) and the usage type
+      (PRIVATE, COMMUTING, BUSINESS or RIDE_SHARING)
 
     and you provide your evaluation in terms of:
 
     - a score (LOW, MEDIUM, HIGH, or VERY_HIGH)
     - the reasoning for the evaluation
 
-    Risk categories:
+    Use the `get_risk_evaluation_by_brand` tool, passing every factor you received.
+    Its 'risk_level' already combines all the factors through the tariff risk table:
+    use it as your score and explain the brand category and the factors behind it.
+
+    Brand categories:
     - VERY_HIGH: Exotic/luxury brands (Ferrari, Lamborghini, etc.)
     - HIGH: Premium brands (BMW, Mercedes, etc.)
     - MEDIUM: Mainstream brands (Volkswagen, Peugeot, etc.)
     - LOW: Other/unknown brands
 
+    The tools resolve aliases, sub-brands, model names and typos on their own and
+    return the canonical 'brand' they matched with a 'confidence' between 0 and 1.
+    Trust the tool's category: do not re-check the brand yourself. Mention the
+    resolved brand in your evaluation when it differs from the input, and state
+    that the brand is unknown when the tool returns no brand.
+
     When the risk cannot be established because of an error from the tool, please return
     a score NOT_AVAILABLE and the reason why you could not perform the evaluation.
     """,
     tools=[get_brand_risk_category, get_risk_evaluation_by_brand],
     output_key="vehicle_risk",
     output_schema=RiskEvaluation,
-    before_model_callback=rate_limit_callback
+    before_model_callback=rate_limit_callback,
+    after_model_callback=repair_structured_output_callback,
+    on_model_error_callback=degrade_on_model_error_callback,
+    before_agent_callback=before_agent_callback,
+    after_agent_callback=after_agent_callback
 )
@@ -0,0 +1,318 @@
+"""Prebuilt index resolving free-form vehicle brand names to a risk category.
+
+The index is built once at import time and resolves, in order:
+
+1. exact brand names and aliases ("VW", "Mercedes-AMG", "Rolls Royce Motor Cars")
+2. model names ("Huracan", "Golf", "911")
+3. multi-word inputs whose words contain a brand or model ("Fiat Panda 1.2")
+4. typos, through a trigram candidate search ranked by edit distance
+   ("Lamborgini", "Porshe")
+
+Every match carries a confidence between 0 and 1.
+"""
+
+import re
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from itertools import chain
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+# Canonical brand -> risk category
+BRAND_CATEGORIES = {
+    # Very high risk brands (exotic/super sports cars)
+    "Ferrari": "VERY_HIGH",
+    "Lamborghini": "VERY_HIGH",
+    "Bugatti": "VERY_HIGH",
+    "McLaren": "VERY_HIGH",
+    "Pagani": "VERY_HIGH",
+    "Koenigsegg": "VERY_HIGH",
+    "Aston Martin": "VERY_HIGH",
+    "Bentley": "VERY_HIGH",
+    "Rolls-Royce": "VERY_HIGH",
+    "Maybach": "VERY_HIGH",
+    # High risk brands (premium/performance brands)
+    "BMW": "HIGH",
+    "Mercedes-Benz": "HIGH",
+    "Audi": "HIGH",
+    "Porsche": "HIGH",
+    "Maserati": "HIGH",
+    "Lexus": "HIGH",
+    "Alfa Romeo": "HIGH",
+    "Jaguar": "HIGH",
+    "Land Rover": "HIGH",
+    # Medium risk brands (mainstream brands)
+    "Volkswagen": "MEDIUM",
+    "Peugeot": "MEDIUM",
+    "Renault": "MEDIUM",
+    "Citroen": "MEDIUM",
+    "Opel": "MEDIUM",
+    "Ford": "MEDIUM",
+    "Chevrolet": "MEDIUM",
+    "Nissan": "MEDIUM",
+    "Mazda": "MEDIUM",
+    "Honda": "MEDIUM",
+    "Toyota": "MEDIUM",
+    "Seat": "MEDIUM",
+    "Skoda": "MEDIUM",
+    "Hyundai": "MEDIUM",
+    "Kia": "MEDIUM",
+    "Mitsubishi": "MEDIUM",
+    "Subaru": "MEDIUM",
+    # Known low risk brands
+    "Fiat": "LOW",
+    "Lancia": "LOW",
+    "Dacia": "LOW",
+    "Suzuki": "LOW",
+    "Smart": "LOW",
+}
+
+# Alternative names and sub-brands -> canonical brand
+BRAND_ALIASES = {
+    "Mercedes": "Mercedes-Benz",
+    "Mercedes-AMG": "Mercedes-Benz",
+    "AMG": "Mercedes-Benz",
+    "Benz": "Mercedes-Benz",
+    "Mercedes-Maybach": "Maybach",
+    "Rolls Royce Motor Cars": "Rolls-Royce",
+    "Bentley Motors": "Bentley",
+    "Aston": "Aston Martin",
+    "Lambo": "Lamborghini",
+    "Alfa": "Alfa Romeo",
+    "Range Rover": "Land Rover",
+    "VW": "Volkswagen",
+    "Volkswagen AG": "Volkswagen",
+    "BMW M": "BMW",
+    "Bayerische Motoren Werke": "BMW",
+    "Audi Sport": "Audi",
+    "Cupra": "Seat",
+    "Abarth": "Fiat",
+    "Chevy": "Chevrolet",
+    "Vauxhall": "Opel",
+}
+
+# Model name -> canonical brand
+MODEL_BRANDS = {
+    "Ferrari": ["Roma", "Portofino", "F8 Tributo", "SF90", "296 GTB", "812 Superfast", "Purosangue", "488"],
+    "Lamborghini": ["Huracan", "Aventador", "Urus", "Revuelto", "Gallardo", "Murcielago"],
+    "Bugatti": ["Chiron", "Veyron"],
+    "McLaren": ["720S", "750S", "Artura", "570S"],
+    "Bentley": ["Continental GT", "Bentayga", "Flying Spur"],
+    "Rolls-Royce": ["Phantom", "Ghost", "Cullinan", "Wraith", "Spectre"],
+    "Aston Martin": ["DB11", "DB12", "Vantage", "DBX"],
+    "BMW": ["Serie 3", "3 Series", "X5", "X3", "M3", "M5"],
+    "Mercedes-Benz": ["Classe A", "A-Class", "Classe C", "C-Class", "GLC", "GLE", "G-Class"],
+    "Audi": ["A3", "A4", "A6", "Q5", "Q7", "RS6", "R8"],
+    "Porsche": ["911", "Cayenne", "Macan", "Taycan", "Panamera"],
+    "Maserati": ["Ghibli", "Levante", "Grecale", "MC20"],
+    "Alfa Romeo": ["Giulia", "Stelvio", "Tonale", "Giulietta"],
+    "Land Rover": ["Defender", "Discovery", "Evoque", "Velar"],
+    "Volkswagen": ["Golf", "Polo", "Passat", "Tiguan", "T-Roc", "Up"],
+    "Peugeot": ["208", "308", "2008", "3008"],
+    "Renault": ["Clio", "Captur", "Megane"],
+    "Citroen": ["C3", "C4"],
+    "Opel": ["Corsa", "Astra", "Mokka"],
+    "Ford": ["Fiesta", "Focus", "Puma", "Kuga", "Mustang"],
+    "Toyota": ["Yaris", "Corolla", "RAV4", "Aygo"],
+    "Nissan": ["Qashqai", "Juke", "Micra"],
+    "Hyundai": ["i10", "i20", "Tucson"],
+    "Kia": ["Picanto", "Sportage", "Ceed"],
+    "Fiat": ["Panda", "500", "Tipo", "Punto"],
+    "Lancia": ["Ypsilon"],
+    "Dacia": ["Sandero", "Duster"],
+}
+
+# Minimum confidence for a fuzzy match to be accepted
+FUZZY_MIN_CONFIDENCE = 0.75
+# Number of trigram candidates ranked by edit distance
+FUZZY_CANDIDATES = 8
+# Number of resolved queries kept per index
+LOOKUP_CACHE_SIZE = 4096
+# Shortest model name matched as a word of a longer query: shorter ones
+# ("Up", "A3") are too easily part of unrelated text ("Pick up")
+TOKEN_MODEL_MIN_LENGTH = 3
+
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+
+class BrandMatch(NamedTuple):
+    """Result of a brand lookup."""
+    brand: str
+    category: str
+    confidence: float
+    match_type: str  # "exact", "alias", "model", "token" or "fuzzy"
+
+
+def normalize(text: str) -> str:
+    """Lower-cases, strips accents and removes every non-alphanumeric character."""
+    return _NON_ALNUM_RE.sub("", _fold(text))
+
+
+def _fold(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def _trigrams(key: str) -> Set[str]:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance, giving up (returning limit + 1) past `limit`.
+
+    Only the diagonal band of width 2 * limit + 1 is computed.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    over = limit + 1
+    width = len(b) + 1
+    previous_previous = [over] * width
+    previous = [j if j <= limit else over for j in range(width)]
+    for i in range(1, len(a) + 1):
+        current = [over] * width
+        if i <= limit:
+            current[0] = i
+        row_min = current[0]
+        char_a = a[i - 1]
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            value = previous[j - 1] if char_a == b[j - 1] else previous[j - 1] + 1
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous_previous[j - 2] + 1)
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > limit:
+            return over
+        previous_previous, previous = previous, current
+    return min(previous[-1], over)
+
+
+class BrandIndex:
+    """In-memory index of brands, aliases and models.
+
+    Keys are normalized names; each resolves to a canonical brand. Brand and
+    alias keys take precedence over model keys on collision. Trigram postings
+    are bucketed by key length, so a fuzzy lookup only scans the keys whose
+    length is within the accepted edit distance.
+    """
+
+    def __init__(self):
+        self._categories: Dict[str, str] = {}
+        self._names: Dict[str, str] = {}
+        self._name_types: Dict[str, str] = {}
+        self._trigram_postings: Dict[Tuple[str, int], List[str]] = {}
+        self._cached_lookup = lru_cache(maxsize=LOOKUP_CACHE_SIZE)(self._lookup)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add_brand(self, brand: str, category: str, aliases: Iterable[str] = ()) -> None:
+        self._categories[brand] = category
+        self._add_name(brand, brand, "exact")
+        for alias in aliases:
+            self._add_name(alias, brand, "alias")
+
+    def add_model(self, model: str, brand: str) -> None:
+        self._add_name(model, brand, "model")
+
+    def _add_name(self, name: str, brand: str, match_type: str) -> None:
+        key = normalize(name)
+        if not key:
+            return
+        existing = self._name_types.get(key)
+        if existing is not None and (existing != "model" or match_type == "model"):
+            return
+        self.clear_cache()
+        if existing is None:
+            for gram in _trigrams(key):
+                self._trigram_postings.setdefault((gram, len(key)), []).append(key)
+        self._names[key] = brand
+        self._name_types[key] = match_type
+
+    def _match(self, key: str, confidence: float, match_type: Optional[str] = None) -> BrandMatch:
+        brand = self._names[key]
+        match_type = match_type or self._name_types[key]
+        if match_type == "model":
+            confidence = min(confidence, 0.95)
+        return BrandMatch(brand, self._categories[brand], confidence, match_type)
+
+    def clear_cache(self) -> None:
+        """Forgets the cached lookups; done automatically when names are added."""
+        self._cached_lookup.cache_clear()
+
+    def lookup(self, query: str) -> Optional[BrandMatch]:
+        """Resolves a brand (or model) name, returning None when nothing matches."""
+        return self._cached_lookup(query)
+
+    def _lookup(self, query: str) -> Optional[BrandMatch]:
+        key = normalize(query)
+        if not key:
+            return None
+        if key in self._names:
+            return self._match(key, 1.0)
+
+        # Longest run of consecutive words naming a brand or model
+        words = [word for word in _NON_ALNUM_RE.split(_fold(query)) if word]
+        for size in range(len(words) - 1, 0, -1):
+            for start in range(len(words) - size + 1):
+                candidate = "".join(words[start:start + size])
+                if candidate not in self._names:
+                    continue
+                if self._name_types[candidate] == "model" and len(candidate) < TOKEN_MODEL_MIN_LENGTH:
+                    continue
+                return self._match(candidate, 0.9, "token")
+
+        return self._fuzzy_lookup(key)
+
+    def _fuzzy_lookup(self, key: str) -> Optional[BrandMatch]:
+        # Lengths a candidate can have while staying above the confidence threshold
+        shortest = len(key) - int(len(key) * (1 - FUZZY_MIN_CONFIDENCE))
+        longest = int(len(key) / FUZZY_MIN_CONFIDENCE)
+        overlap = Counter(chain.from_iterable(
+            self._trigram_postings.get((gram, length), ())
+            for gram in _trigrams(key)
+            for length in range(max(1, shortest), longest + 1)
+        ))
+        if not overlap:
+            return None
+
+        best_key = None
+        best_confidence = 0.0
+        key_grams = len(key) + 1
+        for candidate, shared in overlap.most_common(FUZZY_CANDIDATES):
+            length = max(len(key), len(candidate))
+            limit = int(length * (1 - FUZZY_MIN_CONFIDENCE))
+            # Count filter: every edit destroys at most three trigrams
+            if shared < key_grams - 3 * limit:
+                continue
+            distance = edit_distance(key, candidate, limit)
+            if distance > limit:
+                continue
+            confidence = 1 - distance / length
+            if confidence > best_confidence:
+                best_key, best_confidence = candidate, confidence
+        if best_key is None:
+            return None
+        return self._match(best_key, round(best_confidence, 3), "fuzzy")
+
+
+def build_default_index() -> BrandIndex:
+    """Builds the index from the brand, alias and model tables of this module."""
+    index = BrandIndex()
+    aliases: Dict[str, List[str]] = {}
+    for alias, brand in BRAND_ALIASES.items():
+        aliases.setdefault(brand, []).append(alias)
+    for brand, category in BRAND_CATEGORIES.items():
+        index.add_brand(brand, category, aliases.get(brand, ()))
+    for brand, models in MODEL_BRANDS.items():
+        for model in models:
+            index.add_model(model, brand)
+    return index
+
+
+BRAND_INDEX = build_default_index()
@@ -0,0 +1,213 @@
+"""Precomputed multi-factor vehicle risk table.
+
+The vehicle risk depends on the brand category, the engine power, the yearly
+mileage and the usage type. Each continuous factor is binned, and the score
+of every combination is stored in a dense array indexed by
+
+    brand category x power band x mileage band x usage type
+
+so scoring a vehicle costs a few bisections and one array index. Index 0 of
+each factor is reserved for "unknown", where the table keeps the brand
+category unchanged, so requests without the extra factors score as before.
+
+The table is loaded from `data/vehicle_risk_table.json` (or the file named
+by RISKEVAL_VEHICLE_RISK_TABLE) and can be reloaded at runtime with
+`load_risk_table`. Regenerate the default file with:
+
+    python -m risk_evaluator.sub_agents.vehicle_risk_evaluator.risk_table
+"""
+
+import json
+import logging
+import os
+import re
+from array import array
+from bisect import bisect_right
+from typing import List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+TABLE_VERSION = 1
+
+CATEGORIES = ["LOW", "MEDIUM", "HIGH", "VERY_HIGH"]
+USAGE_TYPES = ["PRIVATE", "COMMUTING", "BUSINESS", "RIDE_SHARING"]
+
+# Band edges: a value v falls in band i (1-based, 0 is unknown) where i - 1 is
+# the number of edges <= v
+POWER_BAND_EDGES_KW = [70, 110, 170, 250]
+MILEAGE_BAND_EDGES_KM = [5000, 10000, 20000, 35000]
+
+DEFAULT_TABLE_PATH = os.path.join(os.path.dirname(__file__), "data", "vehicle_risk_table.json")
+
+# Score adjustments used to generate the default table, in category steps;
+# index 0 (unknown) is always neutral
+_POWER_ADJUSTMENTS = [0.0, -0.5, 0.0, 0.0, 0.5, 1.0]
+_MILEAGE_ADJUSTMENTS = [0.0, -0.5, 0.0, 0.0, 0.5, 1.0]
+_USAGE_ADJUSTMENTS = [0.0, 0.0, 0.0, 0.5, 1.0]
+
+
+class RiskTable:
+    """Dense vehicle risk table with its binning.
+
+    Args:
+        power_band_edges_kw: Ascending power band edges, in kW.
+        mileage_band_edges_km: Ascending yearly mileage band edges, in km.
+        usage_types: Usage type names, in table order.
+        scores: Indexes into CATEGORIES, nested (or flattened in row-major
+            order) as [category][power band][mileage band][usage type], each
+            factor including the leading "unknown" bin.
+    """
+
+    def __init__(
+        self,
+        power_band_edges_kw: Sequence[float],
+        mileage_band_edges_km: Sequence[float],
+        usage_types: Sequence[str],
+        scores: Sequence[int],
+    ):
+        self.power_band_edges_kw = list(power_band_edges_kw)
+        self.mileage_band_edges_km = list(mileage_band_edges_km)
+        self.usage_types = [usage.upper() for usage in usage_types]
+        self._usage_index = {usage: i + 1 for i, usage in enumerate(self.usage_types)}
+
+        self._usage_bins = len(self.usage_types) + 1
+        self._mileage_bins = len(self.mileage_band_edges_km) + 2
+        self._power_bins = len(self.power_band_edges_kw) + 2
+        scores = _flatten(scores)
+        expected = len(CATEGORIES) * self._power_bins * self._mileage_bins * self._usage_bins
+        if len(scores) != expected:
+            raise ValueError(f"Risk table has {len(scores)} scores, expected {expected}")
+        if any(not 0 <= score < len(CATEGORIES) for score in scores):
+            raise ValueError("Risk table scores must be indexes into CATEGORIES")
+        self._scores = array("B", scores)
+
+    def power_band(self, power_kw: Optional[float]) -> int:
+        if power_kw is None:
+            return 0
+        return bisect_right(self.power_band_edges_kw, power_kw) + 1
+
+    def mileage_band(self, yearly_mileage_km: Optional[float]) -> int:
+        if yearly_mileage_km is None:
+            return 0
+        return bisect_right(self.mileage_band_edges_km, yearly_mileage_km) + 1
+
+    def usage_index(self, usage_type: Optional[str]) -> int:
+        """Returns the usage bin, 0 for a missing or unknown usage type."""
+        if not usage_type:
+            return 0
+        return self._usage_index.get(usage_type.strip().upper().replace(" ", "_"), 0)
+
+    def describe_power_band(self, power_kw: Optional[float]) -> str:
+        return _describe_band(self.power_band_edges_kw, self.power_band(power_kw), "kW")
+
+    def describe_mileage_band(self, yearly_mileage_km: Optional[float]) -> str:
+        return _describe_band(self.mileage_band_edges_km, self.mileage_band(yearly_mileage_km), "km/year")
+
+    def score(
+        self,
+        category: str,
+        power_kw: Optional[float] = None,
+        yearly_mileage_km: Optional[float] = None,
+        usage_type: Optional[str] = None,
+    ) -> str:
+        """Returns the risk level of a vehicle."""
+        offset = (
+            ((CATEGORIES.index(category) * self._power_bins + self.power_band(power_kw))
+             * self._mileage_bins + self.mileage_band(yearly_mileage_km))
+            * self._usage_bins + self.usage_index(usage_type)
+        )
+        return CATEGORIES[self._scores[offset]]
+
+    def to_dict(self) -> dict:
+        return {
+            "version": TABLE_VERSION,
+            "categories": CATEGORIES,
+            "power_band_edges_kw": self.power_band_edges_kw,
+            "mileage_band_edges_km": self.mileage_band_edges_km,
+            "usage_types": self.usage_types,
+            "scores": _chunk(_chunk(_chunk(list(self._scores), self._usage_bins),
+                                    self._mileage_bins), self._power_bins),
+        }
+
+    @classmethod
+    def from_file(cls, path: str) -> "RiskTable":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != TABLE_VERSION or data.get("categories") != CATEGORIES:
+            raise ValueError(f"Unsupported risk table format in {path}")
+        return cls(
+            data["power_band_edges_kw"],
+            data["mileage_band_edges_km"],
+            data["usage_types"],
+            data["scores"],
+        )
+
+
+def _describe_band(edges: List[float], band: int, unit: str) -> str:
+    if band == 0:
+        return "unknown"
+    if band == 1:
+        return f"< {edges[0]} {unit}"
+    if band == len(edges) + 1:
+        return f">= {edges[-1]} {unit}"
+    return f"{edges[band - 2]}-{edges[band - 1]} {unit}"
+
+
+def _chunk(items: list, size: int) -> list:
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def _flatten(scores) -> List[int]:
+    flat: List[int] = []
+    for item in scores:
+        if isinstance(item, (list, tuple)):
+            flat.extend(_flatten(item))
+        else:
+            flat.append(item)
+    return flat
+
+
+def build_default_table() -> RiskTable:
+    """Generates the default table from the band adjustments of this module."""
+    scores: List[int] = []
+    for category_index in range(len(CATEGORIES)):
+        for power_adjustment in _POWER_ADJUSTMENTS:
+            for mileage_adjustment in _MILEAGE_ADJUSTMENTS:
+                for usage_adjustment in _USAGE_ADJUSTMENTS:
+                    # Truncate the total adjustment toward zero, so that two
+                    # half steps make a full one in either direction and a
+                    # single half step changes nothing
+                    adjustment = int(power_adjustment + mileage_adjustment + usage_adjustment)
+                    score = category_index + adjustment
+                    scores.append(min(max(score, 0), len(CATEGORIES) - 1))
+    return RiskTable(POWER_BAND_EDGES_KW, MILEAGE_BAND_EDGES_KM, USAGE_TYPES, scores)
+
+
+def load_risk_table(path: Optional[str] = None) -> RiskTable:
+    """Loads (or reloads) the table used by the vehicle tools.
+
+    Args:
+        path: The table file; defaults to RISKEVAL_VEHICLE_RISK_TABLE, then to
+            the table shipped with the package.
+    """
+    global RISK_TABLE
+    path = path or os.getenv("RISKEVAL_VEHICLE_RISK_TABLE") or DEFAULT_TABLE_PATH
+    RISK_TABLE = RiskTable.from_file(path)
+    logger.info("Loaded vehicle risk table from %s", path)
+    return RISK_TABLE
+
+
+RISK_TABLE = load_risk_table()
+
+
+if __name__ == "__main__":
+    # Keep the innermost (usage type) lists on a single line
+    text = re.sub(
+        r"\[\s+([\d,\s]+?)\s+\]",
+        lambda m: "[" + ", ".join(m.group(1).replace(",", " ").split()) + "]",
+        json.dumps(build_default_table().to_dict(), indent=2)
+    )
+    os.makedirs(os.path.dirname(DEFAULT_TABLE_PATH), exist_ok=True)
+    with open(DEFAULT_TABLE_PATH, "w", encoding="utf-8") as f:
+        f.write(text + "\n")
+    print(f"Wrote {DEFAULT_TABLE_PATH}")
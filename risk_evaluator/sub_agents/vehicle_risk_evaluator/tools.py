@@ -1,87 +1,133 @@
+from typing import Optional
+
 from ...shared_libraries.types import RiskEvaluation, RiskScore
+from ...shared_libraries.tool_runtime import instrumented_tool, run_blocking
+from . import risk_table
+from .brand_index import BRAND_INDEX, normalize
 
 
+@instrumented_tool(timeout=5.0)
 def get_brand_risk_category(brand: str) -> dict:
     """Retrieves the risk category of a vehicle brand
 
+    The brand is resolved through a prebuilt index that also recognises
+    aliases and sub-brands (e.g. "VW", "Mercedes-AMG"), model names
+    (e.g. "Huracan") and typos (e.g. "Lamborgini").
+
     Args:
         brand (str): The brand of the vehicle (e.g., "Ferrari", "BMW", "Volkswagen").
 
     Returns:
         dict: A dictionary containing the risk category information.
               Includes a 'status' key ('success' or 'error').
-              If 'success', includes a 'category' key with the risk category.
+              If 'success', includes a 'category' key with the risk category,
+              the canonical 'brand' it was resolved to (None if unknown),
+              a 'confidence' between 0 and 1 and the 'match_type'.
               If 'error', includes an 'error_message' key.
     """
-    brand_normalized = brand.lower().replace(" ", "").replace("-", "")
+    return _brand_risk_category(brand)
 
-    # Very high risk brands (exotic/super sports cars)
-    very_high_risk_brands = {
-        "ferrari", "lamborghini", "bugatti", "mclaren", "pagani",
-        "koenigsegg", "astonmartin", "bentley", "rollsroyce", "maybach"
-    }
 
-    # High risk brands (premium/performance brands)
-    high_risk_brands = {
-        "bmw", "mercedes", "mercedesbenz", "audi", "porsche", "maserati",
-        "lexus", "alfa", "alfaromeo", "jaguar", "landrover"
-    }
+def _brand_risk_category(brand: str) -> dict:
+    match = BRAND_INDEX.lookup(brand)
 
-    # Medium risk brands (mainstream brands)
-    medium_risk_brands = {
-        "volkswagen", "vw", "peugeot", "renault", "citroen", "opel",
-        "ford", "chevrolet", "nissan", "mazda", "honda", "toyota",
-        "seat", "skoda", "hyundai", "kia", "mitsubishi", "subaru"
+    if match is None:
+        # Default to low risk for unknown/other brands
+        return {
+            "status": "success",
+            "category": "LOW",
+            "brand": None,
+            "confidence": 0.0,
+            "match_type": "unknown"
+        }
+    return {
+        "status": "success",
+        "category": match.category,
+        "brand": match.brand,
+        "confidence": match.confidence,
+        "match_type": match.match_type
     }
 
-    if brand_normalized in very_high_risk_brands:
-        return {"status": "success", "category": "VERY_HIGH"}
-    elif brand_normalized in high_risk_brands:
-        return {"status": "success", "category": "HIGH"}
-    elif brand_normalized in medium_risk_brands:
-        return {"status": "success", "category": "MEDIUM"}
-    else:
-        # Default to low risk for unknown/other brands
-        return {"status": "success", "category": "LOW"}
 
+@instrumented_tool(timeout=10.0)
+async def get_risk_evaluation_by_brand(
+    brand: str,
+    power_kw: Optional[int] = None,
+    yearly_mileage_km: Optional[int] = None,
+    usage_type: Optional[str] = None
+) -> dict:
+    """Retrieves the complete risk evaluation for a vehicle
 
-def get_risk_evaluation_by_brand(brand: str) -> dict:
-    """Retrieves the complete risk evaluation for a vehicle brand
+    The brand category is combined with the engine power, the yearly mileage
+    and the usage type through a precomputed risk table. Factors that are not
+    known can be omitted: they leave the brand category unchanged.
 
     Args:
         brand (str): The brand of the vehicle
+        power_kw (int, optional): The engine power in kW
+        yearly_mileage_km (int, optional): The expected yearly mileage in km
+        usage_type (str, optional): PRIVATE, COMMUTING, BUSINESS or RIDE_SHARING
 
     Returns:
         dict: A dictionary containing the risk evaluation.
               Includes a 'status' key ('success' or 'error').
-              If 'success', includes 'risk_level' and 'evaluation' keys.
+              If 'success', includes 'risk_level', 'evaluation', 'brand_category'
+              and the 'factors' bands used for the scoring.
               If 'error', includes an 'error_message' key.
     """
-    category_result = get_brand_risk_category(brand)
+    category_result = await run_blocking(_brand_risk_category, brand)
 
     if category_result["status"] == "error":
         return category_result
 
     category = category_result["category"]
+    if category_result["brand"] is None:
+        name = f"'{brand}' (unknown brand)"
+    elif normalize(category_result["brand"]) == normalize(brand):
+        name = f"'{brand}'"
+    else:
+        name = f"'{brand}' (resolved to {category_result['brand']})"
 
     evaluations = {
         "VERY_HIGH": {
             "risk_level": "VERY_HIGH",
-            "evaluation": f"Brand '{brand}' is classified as a luxury/exotic vehicle with very high theft risk and repair costs."
+            "evaluation": f"Brand {name} is classified as a luxury/exotic vehicle with very high theft risk and repair costs."
         },
         "HIGH": {
             "risk_level": "HIGH",
-            "evaluation": f"Brand '{brand}' is a premium vehicle with elevated theft risk and expensive parts."
+            "evaluation": f"Brand {name} is a premium vehicle with elevated theft risk and expensive parts."
         },
         "MEDIUM": {
             "risk_level": "MEDIUM",
-            "evaluation": f"Brand '{brand}' is a mainstream vehicle with moderate risk profile."
+            "evaluation": f"Brand {name} is a mainstream vehicle with moderate risk profile."
         },
         "LOW": {
             "risk_level": "LOW",
-            "evaluation": f"Brand '{brand}' presents low risk with standard theft rates and affordable repairs."
+            "evaluation": f"Brand {name} presents low risk with standard theft rates and affordable repairs."
         }
     }
 
     result = evaluations.get(category, evaluations["LOW"])
-    return {"status": "success", **result}
+
+    table = risk_table.RISK_TABLE
+    usage_index = table.usage_index(usage_type)
+    factors = {
+        "power": table.describe_power_band(power_kw),
+        "yearly_mileage": table.describe_mileage_band(yearly_mileage_km),
+        "usage_type": table.usage_types[usage_index - 1] if usage_index else "unknown",
+    }
+    risk_level = table.score(category, power_kw, yearly_mileage_km, usage_type)
+    evaluation = result["evaluation"]
+    known = [f"{name.replace('_', ' ')} {value}" for name, value in factors.items() if value != "unknown"]
+    if known:
+        evaluation += f" Combined with {', '.join(known)}, the vehicle risk is {risk_level}."
+
+    return {
+        "status": "success",
+        "risk_level": risk_level,
+        "evaluation": evaluation,
+        "brand_category": category,
+        "factors": factors,
+        "brand": category_result["brand"],
+        "confidence": category_result["confidence"]
+    }
@@ -0,0 +1,52 @@
+import asyncio
+
+from risk_evaluator.shared_libraries.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_execution():
+    async def scenario():
+        flight = SingleFlight()
+        runs = 0
+
+        async def work():
+            nonlocal runs
+            runs += 1
+            await asyncio.sleep(0.01)
+            return "done"
+
+        results = await asyncio.gather(flight.do("key", work), flight.do("key", work))
+        return results, runs, flight.shared_count, flight.in_flight
+
+    assert asyncio.run(scenario()) == (["done", "done"], 1, 1, 0)
+
+
+def test_caller_after_cancellation_starts_a_fresh_execution():
+    async def scenario():
+        flight = SingleFlight()
+        started = asyncio.Event()
+        runs = 0
+
+        async def work():
+            nonlocal runs
+            runs += 1
+            if runs == 1:
+                started.set()
+                try:
+                    await asyncio.sleep(10)
+                finally:
+                    # Slow cleanup: the task is still unwinding when the retry arrives
+                    await asyncio.shield(asyncio.sleep(0.05))
+            return "fresh"
+
+        first = asyncio.create_task(flight.do("key", work))
+        await started.wait()
+        first.cancel()
+        await asyncio.sleep(0)
+        retry = await flight.do("key", work)
+        try:
+            await first
+        except asyncio.CancelledError:
+            pass
+        return retry, runs, flight.in_flight
+
+    assert asyncio.run(scenario()) == ("fresh", 2, 0)